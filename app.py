@@ -1,11 +1,17 @@
 import streamlit as st
 import os
+import hashlib
+import shutil
 import tempfile
-from pdf_processor import PDFProcessor
-from vector_store import VectorStore
-from chatbot import PDFChatbot
-from presentation_generator import PresentationGenerator
-from PIL import Image
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from ui_helpers import load_image, display_page_text, display_page_content
+
+load_dotenv()
+
+# Presentation Mode can be switched off for deployments that only need chat
+PRESENTATION_MODE_ENABLED = os.getenv("ENABLE_PRESENTATION_MODE", "true").lower() == "true"
 
 # Page config
 st.set_page_config(
@@ -14,13 +20,28 @@ st.set_page_config(
     layout="wide"
 )
 
+# Heavy modules are imported on first use so reruns and first paint don't pay for them.
+# The vector index, chatbot and presentation generator hold one user's corpus, conversation
+# and presentation, so each session gets its own.
+def get_vector_store():
+    if 'vector_store' not in st.session_state:
+        from vector_store import VectorStore
+        st.session_state.vector_store = VectorStore()
+    return st.session_state.vector_store
+
+def get_chatbot():
+    if 'chatbot' not in st.session_state:
+        from chatbot import PDFChatbot
+        st.session_state.chatbot = PDFChatbot()
+    return st.session_state.chatbot
+
+def get_presentation_generator():
+    if 'presentation_generator' not in st.session_state:
+        from presentation_generator import PresentationGenerator
+        st.session_state.presentation_generator = PresentationGenerator()
+    return st.session_state.presentation_generator
+
 # Initialize session state
-if 'vector_store' not in st.session_state:
-    st.session_state.vector_store = None
-if 'chatbot' not in st.session_state:
-    st.session_state.chatbot = None
-if 'presentation_generator' not in st.session_state:
-    st.session_state.presentation_generator = None
 if 'processed_pdfs' not in st.session_state:
     st.session_state.processed_pdfs = False
 if 'current_page_index' not in st.session_state:
@@ -33,49 +54,12 @@ if 'current_slide' not in st.session_state:
     st.session_state.current_slide = 0
 if 'pages_data' not in st.session_state:
     st.session_state.pages_data = []
-
-def display_page_content(page_data):
-    """Display a single page's content with full page image"""
-    st.subheader(f"📄 {page_data['pdf_name']} - Page {page_data['page_number']}")
-    
-    # Create two columns: text on left, page image on right
-    col1, col2 = st.columns([1, 1])
-    
-    with col1:
-        # Display text content
-        st.write("**Text Content:**")
-        if page_data['text']:
-            # Limit text length for better layout
-            text_preview = page_data['text'][:500] + "..." if len(page_data['text']) > 500 else page_data['text']
-            st.write(text_preview)
-            if len(page_data['text']) > 500:
-                with st.expander("Show full text"):
-                    st.write(page_data['text'])
-        else:
-            st.write("*No text content found on this page*")
-    
-    with col2:
-        # Display full page image
-        st.write("**Full Page:**")
-        if 'full_page_image' in page_data and os.path.exists(page_data['full_page_image']):
-            try:
-                page_image = Image.open(page_data['full_page_image'])
-                st.image(page_image, caption=f"Page {page_data['page_number']}", use_column_width=True)
-            except Exception as e:
-                st.error(f"Error loading page image: {e}")
-        else:
-            st.warning("Full page image not available")
-            
-            # Fallback: show individual extracted images if available
-            if page_data.get('images'):
-                st.write(f"**Extracted Images ({len(page_data['images'])}):**")
-                for i, img_info in enumerate(page_data['images']):
-                    try:
-                        if os.path.exists(img_info['image_path']):
-                            image = Image.open(img_info['image_path'])
-                            st.image(image, caption=f"Image {i+1}", width=200)
-                    except Exception as e:
-                        st.error(f"Error loading image: {e}")
+if 'corpus_id' not in st.session_state:
+    st.session_state.corpus_id = None
+if 'last_query' not in st.session_state:
+    st.session_state.last_query = None
+if 'responses' not in st.session_state:
+    st.session_state.responses = {}  # (corpus_id, query) -> answer, so reruns redisplay it without asking again
 
 def display_slide(slide_data, presentation_data):
     """Display a single slide in presentation mode"""
@@ -101,9 +85,9 @@ def display_slide(slide_data, presentation_data):
         st.markdown("### 🖼️ Visuals")
         if slide_data.get('relevant_pages'):
             for page in slide_data['relevant_pages']:
-                if page.get('full_page_image') and os.path.exists(page['full_page_image']):
+                if page.get('full_page_image_ok'):
                     try:
-                        page_image = Image.open(page['full_page_image'])
+                        page_image = load_image(page.get('thumb_image') or page['full_page_image'])
                         st.image(
                             page_image, 
                             caption=f"Page {page['page_number']}", 
@@ -125,6 +109,186 @@ def display_presentation_overview(presentation_data):
     for i, slide in enumerate(presentation_data['slides'], 1):
         st.markdown(f"{i}. **{slide['title']}**")
 
+def process_pdfs_parallel(processor, temp_paths):
+    """Extract pages from each PDF on a thread pool, preserving upload order"""
+    progress = st.progress(0.0)
+    results = [[] for _ in temp_paths]
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(temp_paths))) as executor:
+        futures = {
+            executor.submit(processor.extract_page_content, path): i
+            for i, path in enumerate(temp_paths)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+                print(f"Processed {len(results[i])} pages from {temp_paths[i]}")
+            except Exception as e:
+                print(f"Error processing {temp_paths[i]}: {e}")
+            progress.progress(done / len(temp_paths))
+    
+    progress.empty()
+    return [page for pages in results for page in pages]
+
+def mark_available_images(pages_data):
+    """Record once, at ingest, which page and extracted images exist on disk"""
+    for page in pages_data:
+        page['full_page_image_ok'] = bool(page.get('full_page_image')) and os.path.exists(page['full_page_image'])
+        for img_info in page.get('images', []):
+            img_info['ok'] = os.path.exists(img_info['image_path'])
+
+DISPLAY_IMAGE_WIDTH = 1024  # Page images are shown from a render this wide; the full render is kept for zooming
+
+UPLOAD_CACHE_DIR = os.path.join(tempfile.gettempdir(), "pdf_cache")
+UPLOAD_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+def _evict_upload_cache():
+    """Delete least recently used uploads until the cache fits its size budget"""
+    try:
+        entries = []
+        for name in os.listdir(UPLOAD_CACHE_DIR):
+            path = os.path.join(UPLOAD_CACHE_DIR, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= UPLOAD_CACHE_MAX_BYTES:
+                break
+            os.unlink(path)
+            total -= size
+    except OSError as e:
+        print(f"Error evicting upload cache: {e}")
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def save_upload(uploaded_file):
+    """Store an upload at a content-addressed path, streaming it in chunks.
+    
+    The file is hashed first and the write is skipped if that content is
+    already on disk. Returns (sha256, path).
+    """
+    sha256_hash = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(UPLOAD_CHUNK_SIZE), b""):
+        sha256_hash.update(chunk)
+    file_hash = sha256_hash.hexdigest()
+    
+    os.makedirs(UPLOAD_CACHE_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_CACHE_DIR, f"{file_hash}.pdf")
+    if os.path.exists(path):
+        os.utime(path)  # Mark as recently used for eviction
+    else:
+        partial_path = f"{path}.{threading.get_ident()}.part"
+        uploaded_file.seek(0)
+        with open(partial_path, "wb") as f:
+            shutil.copyfileobj(uploaded_file, f, length=UPLOAD_CHUNK_SIZE)
+        os.replace(partial_path, path)
+    return file_hash, path
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def process_pdfs_cached(file_hashes, _pdf_paths):
+    """Process uploaded PDFs, memoized on the content hash of each file"""
+    # Process PDFs in parallel, one worker per file
+    from pdf_processor import PDFProcessor
+    processor = PDFProcessor(thumbnail_width=DISPLAY_IMAGE_WIDTH)
+    pages_data = process_pdfs_parallel(processor, list(_pdf_paths))
+    mark_available_images(pages_data)
+    
+    threading.Thread(target=_evict_upload_cache, daemon=True).start()
+    return pages_data
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def search_pages(corpus_id, query, _vector_store):
+    """Search the corpus, memoized per (corpus, query); _vector_store must hold the index built for corpus_id"""
+    search_results = _vector_store.search(query, k=5)
+    for result in search_results:
+        result['_header'] = f"📄 {result['pdf_name']} - Page {result['page_number']} (Score: {result.get('similarity_score', 0):.3f})"
+    return search_results
+
+def _go_to_slide(index):
+    st.session_state.current_slide = index
+    st.session_state.slide_selector = index
+
+def _on_slide_selected():
+    st.session_state.current_slide = st.session_state.slide_selector
+
+@st.fragment
+def presentation_view():
+    """Presentation navigation and slide display; reruns on its own when navigating"""
+    presentation_data = st.session_state.presentation_data
+    current_slide = st.session_state.current_slide
+    max_slide = len(presentation_data['slides']) - 1
+    
+    st.markdown("---")
+    st.header("🎯 Presentation Mode")
+    
+    # Navigation buttons
+    col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+    
+    with col1:
+        st.button("⏮️ First", on_click=_go_to_slide, args=(0,), disabled=current_slide <= 0)
+    
+    with col2:
+        st.button("◀️ Previous", on_click=_go_to_slide, args=(current_slide - 1,), disabled=current_slide <= 0)
+    
+    with col3:
+        slide_options = presentation_data['_slide_options']
+        if 'slide_selector' not in st.session_state:
+            st.session_state.slide_selector = max(0, current_slide)
+        st.selectbox(
+            "Jump to slide:",
+            range(len(slide_options)),
+            format_func=lambda i: slide_options[i],
+            key="slide_selector",
+            on_change=_on_slide_selected
+        )
+    
+    with col4:
+        st.button("▶️ Next", on_click=_go_to_slide, args=(current_slide + 1,), disabled=current_slide >= max_slide)
+    
+    with col5:
+        st.button("⏭️ Last", on_click=_go_to_slide, args=(max_slide,), disabled=current_slide >= max_slide)
+    
+    st.markdown("---")
+    
+    # Display current slide or overview
+    if current_slide == -1:  # Overview mode
+        display_presentation_overview(presentation_data)
+    else:
+        display_slide(presentation_data['slides'][current_slide], presentation_data)
+
+def _go_to_page(index):
+    st.session_state.current_page_index = index
+
+@st.fragment
+def single_page_view():
+    """Single page navigation and display; reruns on its own when navigating"""
+    search_results = st.session_state.search_results
+    page_index = st.session_state.current_page_index
+    
+    st.header("📖 Page View")
+    
+    # Navigation
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        st.button("← Previous", on_click=_go_to_page, args=(page_index - 1,), disabled=page_index <= 0)
+    
+    with col2:
+        st.write(f"Page {page_index + 1} of {len(search_results)}")
+    
+    with col3:
+        st.button("Next →", on_click=_go_to_page, args=(page_index + 1,), disabled=page_index >= len(search_results) - 1)
+    
+    # Display current page
+    current_page = search_results[page_index]
+    display_page_content(current_page)
+    
+    # Similarity score
+    st.caption(f"Relevance Score: {current_page.get('similarity_score', 0):.3f}")
+
 def main():
     st.title("📚 PDF Chatbot with Images")
     st.markdown("Upload PDFs and chat with their content while viewing related images!")
@@ -143,32 +307,17 @@ def main():
         
         if uploaded_files and st.button("Process PDFs"):
             with st.spinner("Processing PDFs..."):
-                # Initialize vector store and chatbot
-                if st.session_state.vector_store is None:
-                    st.session_state.vector_store = VectorStore()
-                if st.session_state.chatbot is None:
-                    st.session_state.chatbot = PDFChatbot()
-                
-                # Save uploaded files temporarily
-                temp_paths = []
-                for uploaded_file in uploaded_files:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                        tmp.write(uploaded_file.getvalue())
-                        temp_paths.append(tmp.name)
-                
-                # Process PDFs
-                processor = PDFProcessor()
-                pages_data = processor.process_multiple_pdfs(temp_paths)
+                # Process PDFs (cached on file content hashes)
+                file_hashes, pdf_paths = zip(*(save_upload(f) for f in uploaded_files))
+                pages_data = process_pdfs_cached(file_hashes, pdf_paths)
                 
                 # Store pages data and create embeddings
                 st.session_state.pages_data = pages_data
-                st.session_state.vector_store.create_embeddings(pages_data)
+                get_vector_store().create_embeddings(pages_data)
+                # Only name the corpus once this session's index actually holds it
+                st.session_state.corpus_id = hashlib.sha256("|".join(file_hashes).encode()).hexdigest()
                 st.session_state.processed_pdfs = True
                 
-                # Clean up temporary files
-                for temp_path in temp_paths:
-                    os.unlink(temp_path)
-                
                 st.success(f"Processed {len(pages_data)} pages from {len(uploaded_files)} PDFs!")
         
         st.markdown("---")
@@ -177,19 +326,21 @@ def main():
         st.header("👀 View Mode")
         view_mode = st.radio(
             "Choose viewing style:",
-            ["Presentation Mode", "Multiple Pages", "Single Page", "Chat Only"],
+            (["Presentation Mode"] if PRESENTATION_MODE_ENABLED else []) + ["Multiple Pages", "Single Page", "Chat Only"],
             help="Select how to display search results"
         )
         
         # Generate presentation button
-        if st.session_state.processed_pdfs and st.button("🎯 Generate Presentation"):
+        if PRESENTATION_MODE_ENABLED and st.session_state.processed_pdfs and st.button("🎯 Generate Presentation"):
             with st.spinner("Creating presentation from PDF content..."):
-                if st.session_state.presentation_generator is None:
-                    st.session_state.presentation_generator = PresentationGenerator()
-                
-                st.session_state.presentation_data = st.session_state.presentation_generator.create_full_presentation(
+                presentation_data = get_presentation_generator().create_full_presentation(
                     st.session_state.pages_data
                 )
+                presentation_data['_slide_options'] = [
+                    f"Slide {i+1}: {slide['title']}" for i, slide in enumerate(presentation_data['slides'])
+                ]
+                st.session_state.presentation_data = presentation_data
+                _go_to_slide(0)
                 st.success(f"Generated {st.session_state.presentation_data['total_slides']} slides!")
         
         if st.session_state.search_results:
@@ -210,85 +361,48 @@ def main():
     # Chat interface
     st.header("💬 Chat with your PDFs")
     
-    # Query input
-    query = st.text_input(
-        "Ask a question about your PDFs:",
-        placeholder="e.g., What are the key findings? How does process X work?",
-        key="user_query"
-    )
+    # Query input; only an explicit submit starts a new question
+    with st.form("query_form"):
+        query = st.text_input(
+            "Ask a question about your PDFs:",
+            placeholder="e.g., What are the key findings? How does process X work?",
+            key="user_query"
+        )
+        submitted = st.form_submit_button("Ask")
+    
+    if submitted and query and query != st.session_state.last_query:
+        # Reset page navigation for the new question
+        st.session_state.current_page_index = 0
+        st.session_state.last_query = query
     
+    query = st.session_state.last_query
     if query:
-        if st.session_state.vector_store is None:
+        if not st.session_state.processed_pdfs:
             st.error("Please upload and process PDFs first!")
             return
             
         with st.spinner("Searching and generating response..."):
             # Search for relevant pages
-            search_results = st.session_state.vector_store.search(query, k=5)
+            search_results = search_pages(st.session_state.corpus_id, query, get_vector_store())
             st.session_state.search_results = search_results
-            st.session_state.current_page_index = 0
-            
-            # Generate response
-            response = st.session_state.chatbot.generate_response(query, search_results)
             
-            # Display response
+            # Display response, streaming it the first time the question is asked
             st.markdown("**🤖 Response:**")
-            st.write(response)
+            cache_key = (st.session_state.corpus_id, query)
+            if cache_key in st.session_state.responses:
+                st.write(st.session_state.responses[cache_key])
+            else:
+                chatbot = get_chatbot()
+                answer = st.write_stream(chatbot.stream_response(query, search_results))
+                # Errors are streamed as text but never reach the history; keep only real answers
+                history = chatbot.conversation_history
+                if history and history[-1]['content'] == answer:
+                    st.session_state.responses[cache_key] = answer
     
     # Display results based on view mode
     if view_mode == "Presentation Mode":
         if st.session_state.presentation_data:
-            st.markdown("---")
-            st.header("🎯 Presentation Mode")
-            
-            # Navigation buttons
-            col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
-            
-            with col1:
-                if st.button("⏮️ First") and st.session_state.current_slide > 0:
-                    st.session_state.current_slide = 0
-                    st.experimental_rerun()
-            
-            with col2:
-                if st.button("◀️ Previous") and st.session_state.current_slide > 0:
-                    st.session_state.current_slide -= 1
-                    st.experimental_rerun()
-            
-            with col3:
-                slide_options = [f"Slide {i+1}: {slide['title']}" 
-                               for i, slide in enumerate(st.session_state.presentation_data['slides'])]
-                selected_slide = st.selectbox(
-                    "Jump to slide:",
-                    slide_options,
-                    index=st.session_state.current_slide
-                )
-                if selected_slide:
-                    new_slide = int(selected_slide.split(":")[0].split()[1]) - 1
-                    if new_slide != st.session_state.current_slide:
-                        st.session_state.current_slide = new_slide
-                        st.experimental_rerun()
-            
-            with col4:
-                max_slide = len(st.session_state.presentation_data['slides']) - 1
-                if st.button("▶️ Next") and st.session_state.current_slide < max_slide:
-                    st.session_state.current_slide += 1
-                    st.experimental_rerun()
-            
-            with col5:
-                max_slide = len(st.session_state.presentation_data['slides']) - 1
-                if st.button("⏭️ Last") and st.session_state.current_slide < max_slide:
-                    st.session_state.current_slide = max_slide
-                    st.experimental_rerun()
-            
-            st.markdown("---")
-            
-            # Display current slide or overview
-            if st.session_state.current_slide == -1:  # Overview mode
-                display_presentation_overview(st.session_state.presentation_data)
-            else:
-                current_slide_data = st.session_state.presentation_data['slides'][st.session_state.current_slide]
-                display_slide(current_slide_data, st.session_state.presentation_data)
-                
+            presentation_view()
         else:
             st.info("Please generate a presentation first using the '🎯 Generate Presentation' button in the sidebar.")
     
@@ -296,39 +410,25 @@ def main():
         st.markdown("---")
         
         if view_mode == "Single Page":
-            st.header("📖 Page View")
-            
-            # Navigation
-            col1, col2, col3 = st.columns([1, 2, 1])
-            
-            with col1:
-                if st.button("← Previous") and st.session_state.current_page_index > 0:
-                    st.session_state.current_page_index -= 1
-                    st.experimental_rerun()
-            
-            with col2:
-                st.write(f"Page {st.session_state.current_page_index + 1} of {len(st.session_state.search_results)}")
-            
-            with col3:
-                if st.button("Next →") and st.session_state.current_page_index < len(st.session_state.search_results) - 1:
-                    st.session_state.current_page_index += 1
-                    st.experimental_rerun()
-            
-            # Display current page
-            if st.session_state.search_results:
-                current_page = st.session_state.search_results[st.session_state.current_page_index]
-                display_page_content(current_page)
-                
-                # Similarity score
-                st.caption(f"Relevance Score: {current_page.get('similarity_score', 0):.3f}")
+            single_page_view()
         
         elif view_mode == "Multiple Pages":
             st.header("📚 All Relevant Pages")
             
             for i, page_data in enumerate(st.session_state.search_results):
                 st.markdown("---")
-                st.subheader(f"📄 {page_data['pdf_name']} - Page {page_data['page_number']} (Score: {page_data.get('similarity_score', 0):.3f})")
-                display_page_content(page_data)
+                st.subheader(page_data['_header'])
+                display_page_text(page_data)
+            
+            # Render all page images as a single element
+            pages_with_images = [p for p in st.session_state.search_results if p.get('full_page_image_ok')]
+            if pages_with_images:
+                st.markdown("---")
+                st.image(
+                    [load_image(p.get('thumb_image') or p['full_page_image']) for p in pages_with_images],
+                    caption=[p['_header'] for p in pages_with_images],
+                    use_column_width=True
+                )
     
     # Footer
     st.markdown("---")
@@ -1,12 +1,14 @@
 import streamlit as st
 import os
+import shutil
 import tempfile
-import time
-from pdf_processor import PDFProcessor
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from pdf_processor import process_pdf_file
 from vector_store import VectorStore
 from streaming_chatbot import StreamingChatbot
 from presentation_generator import PresentationGenerator
-from PIL import Image
+from ui_helpers import load_image
 
 # Page config
 st.set_page_config(
@@ -16,45 +18,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for chat UI
-st.markdown("""
+# Custom CSS for the presentation view
+SLIDE_CSS = """
 <style>
-.chat-container {
-    max-height: 600px;
-    overflow-y: auto;
-    padding: 1rem;
-    border: 1px solid #e0e0e0;
-    border-radius: 10px;
-    background-color: #f9f9f9;
-}
-
-.user-message {
-    background-color: #007bff;
-    color: white;
-    padding: 10px 15px;
-    border-radius: 15px 15px 5px 15px;
-    margin: 10px 0;
-    margin-left: 20%;
-    text-align: right;
-}
-
-.assistant-message {
-    background-color: #e9ecef;
-    color: #333;
-    padding: 10px 15px;
-    border-radius: 15px 15px 15px 5px;
-    margin: 10px 0;
-    margin-right: 20%;
-}
-
-.context-info {
-    background-color: #fff3cd;
-    padding: 5px 10px;
-    border-radius: 5px;
-    font-size: 0.8em;
-    margin: 5px 0;
-}
-
 .slide-container {
     border: 2px solid #007bff;
     border-radius: 10px;
@@ -63,7 +29,7 @@ st.markdown("""
     background-color: white;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # Initialize session state
 def init_session_state():
@@ -89,13 +55,11 @@ def init_session_state():
         st.session_state.related_pages = []
 
 def display_chat_message(message_type: str, content: str, context_info: str = None):
-    """Display a chat message with proper styling"""
-    if message_type == "user":
-        st.markdown(f'<div class="user-message">{content}</div>', unsafe_allow_html=True)
-    else:
-        st.markdown(f'<div class="assistant-message">{content}</div>', unsafe_allow_html=True)
+    """Display a chat message in a Streamlit chat bubble"""
+    with st.chat_message(message_type):
+        st.markdown(content)
         if context_info:
-            st.markdown(f'<div class="context-info">{context_info}</div>', unsafe_allow_html=True)
+            st.caption(context_info)
 
 def display_related_pages(pages: list):
     """Display related pages in a compact format"""
@@ -112,16 +76,15 @@ def display_related_pages(pages: list):
                 st.write(text_preview)
             
             with col2:
-                if page.get('full_page_image') and os.path.exists(page['full_page_image']):
+                if page.get('full_page_image_ok'):
                     try:
-                        page_image = Image.open(page['full_page_image'])
-                        st.image(page_image, caption=f"Page {page['page_number']}", use_column_width=True)
+                        st.image(load_image(page['thumb_image']), caption=f"Page {page['page_number']}", use_column_width=True)
                     except Exception as e:
                         st.error(f"Error loading image: {e}")
 
 def display_presentation_slide(slide_data, presentation_data):
     """Display a presentation slide in chat mode"""
-    st.markdown('<div class="slide-container">', unsafe_allow_html=True)
+    st.markdown(SLIDE_CSS + '<div class="slide-container">', unsafe_allow_html=True)
     
     # Slide header
     st.markdown(f"## 🎯 {slide_data['title']}")
@@ -168,10 +131,9 @@ def display_presentation_slide(slide_data, presentation_data):
         st.markdown("### 🖼️ Visuals")
         if slide_data.get('relevant_pages'):
             for page in slide_data['relevant_pages']:
-                if page.get('full_page_image') and os.path.exists(page['full_page_image']):
+                if page.get('full_page_image_ok'):
                     try:
-                        page_image = Image.open(page['full_page_image'])
-                        st.image(page_image, caption=f"Page {page['page_number']}", use_column_width=True)
+                        st.image(load_image(page['thumb_image']), caption=f"Page {page['page_number']}", use_column_width=True)
                     except:
                         pass
         else:
@@ -210,17 +172,21 @@ def main():
                 # Save and process files
                 temp_paths = []
                 for uploaded_file in uploaded_files:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                        tmp.write(uploaded_file.getvalue())
+                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", buffering=1024 * 1024) as tmp:
+                        # Stream in 1 MB chunks rather than copying the whole upload into memory
+                        uploaded_file.seek(0)
+                        shutil.copyfileobj(uploaded_file, tmp, length=1024 * 1024)
                         temp_paths.append(tmp.name)
                 
-                # Process PDFs
-                processor = PDFProcessor()
-                pages_data = processor.process_multiple_pdfs(temp_paths)
+                # Process PDFs across cores, one file per worker process
+                with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(temp_paths))) as executor:
+                    pages_data = list(chain.from_iterable(executor.map(process_pdf_file, temp_paths)))
                 st.session_state.pages_data = pages_data
                 
                 # Create embeddings
                 st.session_state.vector_store.create_embeddings(pages_data)
+                if st.session_state.streaming_chatbot:
+                    st.session_state.streaming_chatbot.reset_search_cache()
                 st.session_state.processed_pdfs = True
                 
                 # Clean up
@@ -290,14 +256,8 @@ def main():
     st.header("💬 Chat Interface")
     
     # Chat history display
-    chat_container = st.container()
-    with chat_container:
-        for message in st.session_state.chat_messages:
-            if message["role"] == "user":
-                display_chat_message("user", message["content"])
-            else:
-                context_info = message.get("context_info", "")
-                display_chat_message("assistant", message["content"], context_info)
+    for message in st.session_state.chat_messages:
+        display_chat_message(message["role"], message["content"], message.get("context_info"))
     
     # Chat input
     user_input = st.chat_input("Ask a question about your PDFs...")
@@ -307,8 +267,7 @@ def main():
         st.session_state.chat_messages.append({"role": "user", "content": user_input})
         
         # Display user message immediately
-        with chat_container:
-            display_chat_message("user", user_input)
+        display_chat_message("user", user_input)
         
         # Generate streaming response
         if st.session_state.streaming_chatbot:
@@ -316,15 +275,14 @@ def main():
             related_pages = st.session_state.streaming_chatbot.get_related_pages(user_input)
             st.session_state.related_pages = related_pages
             
-            # Create container for streaming response
-            response_container = st.empty()
-            full_response = ""
-            
-            # Stream the response
-            for chunk in st.session_state.streaming_chatbot.generate_streaming_response(user_input):
-                full_response += chunk
-                response_container.markdown(f'<div class="assistant-message">{full_response}</div>', unsafe_allow_html=True)
-                time.sleep(0.02)  # Small delay for visual effect
+            with st.chat_message("assistant"):
+                # Stream the response; write_stream only sends the new text of each chunk
+                full_response = st.write_stream(
+                    st.session_state.streaming_chatbot.generate_streaming_response(user_input)
+                )
+                
+                if related_pages:
+                    st.caption(f"📄 Based on {len(related_pages)} related pages")
             
             # Add context info
             if related_pages:
@@ -341,8 +299,6 @@ def main():
             if related_pages:
                 with st.expander("📄 View Related Pages"):
                     display_related_pages(related_pages)
-        
-        st.experimental_rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
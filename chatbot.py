@@ -1,27 +1,27 @@
 import openai
 import os
-from typing import List, Dict, Any
+from collections import deque
+from typing import List, Dict, Any, Iterator
 from dotenv import load_dotenv
+from llm_cache import LLMCache
 
 load_dotenv()
 
 class PDFChatbot:
     def __init__(self):
         openai.api_key = os.getenv("OPENAI_API_KEY")
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=10)  # Keep last 5 exchanges
+        self.response_cache = LLMCache()
+        self.page_context_cache: Dict[str, str] = {}  # page_id -> formatted context block
         
-    def generate_response(self, query: str, relevant_pages: List[Dict[str, Any]]) -> str:
-        """Generate chatbot response using OpenAI API with page context"""
+    def _build_messages(self, query: str, relevant_pages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build the chat messages for a query with page context"""
         
         # Build context from relevant pages
-        context = "Here are the relevant pages from the PDFs:\n\n"
-        
-        for i, page in enumerate(relevant_pages, 1):
-            context += f"**Page {i} - {page['pdf_name']} (Page {page['page_number']})**\n"
-            context += f"Content: {page['text'][:1000]}...\n"  # Limit content length
-            if page['images']:
-                context += f"This page contains {len(page['images'])} image(s)\n"
-            context += "\n---\n\n"
+        context = "Here are the relevant pages from the PDFs:\n\n" + "".join(
+            f"**Page {i} - {self._page_context(page)}"
+            for i, page in enumerate(relevant_pages, 1)
+        )
         
         # Create system message
         system_message = {
@@ -40,7 +40,34 @@ class PDFChatbot:
         }
         
         # Add to conversation history
-        messages = [system_message] + self.conversation_history + [user_message]
+        return [system_message] + list(self.conversation_history) + [user_message]
+    
+    def _page_context(self, page: Dict[str, Any]) -> str:
+        """Get the formatted context block for a page, formatting it only once"""
+        block = self.page_context_cache.get(page['page_id'])
+        if block is None:
+            block = f"{page['pdf_name']} (Page {page['page_number']})**\n"
+            block += f"Content: {page['text'][:1000]}...\n"  # Limit content length
+            if page['images']:
+                block += f"This page contains {len(page['images'])} image(s)\n"
+            block += "\n---\n\n"
+            self.page_context_cache[page['page_id']] = block
+        return block
+    
+    def _add_to_history(self, user_message: Dict[str, str], assistant_response: str):
+        """Update conversation history; the deque drops the oldest messages itself"""
+        self.conversation_history.append(user_message)
+        self.conversation_history.append({"role": "assistant", "content": assistant_response})
+    
+    def generate_response(self, query: str, relevant_pages: List[Dict[str, Any]]) -> str:
+        """Generate chatbot response using OpenAI API with page context"""
+        messages = self._build_messages(query, relevant_pages)
+        cache_key = self.response_cache.key(messages, query, [p['page_id'] for p in relevant_pages])
+        
+        cached_response = self.response_cache.get(cache_key)
+        if cached_response is not None:
+            self._add_to_history(messages[-1], cached_response)
+            return cached_response
         
         try:
             response = openai.ChatCompletion.create(
@@ -51,19 +78,49 @@ class PDFChatbot:
             )
             
             assistant_response = response.choices[0].message['content']
-            
-            # Update conversation history (keep last 5 exchanges)
-            self.conversation_history.append(user_message)
-            self.conversation_history.append({"role": "assistant", "content": assistant_response})
-            
-            if len(self.conversation_history) > 10:  # Keep last 5 exchanges
-                self.conversation_history = self.conversation_history[-10:]
+            self.response_cache.set(cache_key, assistant_response)
+            self._add_to_history(messages[-1], assistant_response)
             
             return assistant_response
             
         except Exception as e:
             return f"Error generating response: {str(e)}"
     
+    def stream_response(self, query: str, relevant_pages: List[Dict[str, Any]]) -> Iterator[str]:
+        """Stream chatbot response tokens as they are generated"""
+        messages = self._build_messages(query, relevant_pages)
+        cache_key = self.response_cache.key(messages, query, [p['page_id'] for p in relevant_pages])
+        
+        cached_response = self.response_cache.get(cache_key)
+        if cached_response is not None:
+            self._add_to_history(messages[-1], cached_response)
+            yield cached_response
+            return
+        
+        try:
+            response = openai.ChatCompletion.create(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                max_tokens=1000,
+                temperature=0.7,
+                stream=True
+            )
+            
+            chunks = []
+            for chunk in response:
+                if 'choices' in chunk and len(chunk['choices']) > 0:
+                    delta = chunk['choices'][0].get('delta', {})
+                    if 'content' in delta:
+                        chunks.append(delta['content'])
+                        yield delta['content']
+            
+            assistant_response = "".join(chunks)
+            self.response_cache.set(cache_key, assistant_response)
+            self._add_to_history(messages[-1], assistant_response)
+            
+        except Exception as e:
+            yield f"Error generating response: {str(e)}"
+    
     def clear_history(self):
         """Clear conversation history"""
-        self.conversation_history = []
\ No newline at end of file
+        self.conversation_history.clear()
\ No newline at end of file
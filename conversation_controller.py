@@ -1,4 +1,5 @@
-import uuid
+import secrets
+from collections import OrderedDict
 from typing import Dict, Optional
 from models import ConversationState, ConversationMode, BotResponse, UserMessage, ConversationMessage
 from presentation_generator import PresentationGenerator
@@ -10,15 +11,16 @@ import logging
 logger = logging.getLogger(__name__)
 
 class ConversationController:
-    def __init__(self, presentation_generator: PresentationGenerator, rag_engine: RAGEngine):
+    def __init__(self, presentation_generator: PresentationGenerator, rag_engine: RAGEngine, max_conversations: int = 10000):
         self.presentation_generator = presentation_generator
         self.rag_engine = rag_engine
-        self.conversations: Dict[str, ConversationState] = {}
+        self.conversations: Dict[str, ConversationState] = OrderedDict()  # LRU order, oldest first
+        self.max_conversations = max_conversations
         self.restart_presentation_callback = None
         self.conversation_history = ConversationHistory()
         
     def create_conversation(self) -> str:
-        conversation_id = str(uuid.uuid4())
+        conversation_id = secrets.token_hex(16)
         self.conversations[conversation_id] = ConversationState(
             conversation_id=conversation_id,
             mode=ConversationMode.PRESENTATION,
@@ -28,13 +30,18 @@ class ConversationController:
             paused_mid_segment=False,
             pause_timestamp=None
         )
+        if len(self.conversations) > self.max_conversations:
+            self.conversations.popitem(last=False)
         return conversation_id
     
     def set_restart_presentation_callback(self, callback):
         self.restart_presentation_callback = callback
         
     def get_state(self, conversation_id: str) -> Optional[ConversationState]:
-        return self.conversations.get(conversation_id)
+        state = self.conversations.get(conversation_id)
+        if state is not None:
+            self.conversations.move_to_end(conversation_id)
+        return state
         
     async def handle_message(self, conversation_id: str, message: UserMessage) -> BotResponse:
         state = self.get_state(conversation_id)
@@ -53,13 +60,13 @@ class ConversationController:
         if state.mode == ConversationMode.PRESENTATION and message.text:
             # The current segment being displayed is the one we want to resume from
             currently_displaying_segment = max(0, state.current_segment - 1)
-            logger.info(f"User interrupted during segment {currently_displaying_segment} (next would be {state.current_segment})")
+            logger.info("User interrupted during segment %s (next would be %s)", currently_displaying_segment, state.current_segment)
             
             # Capture the interrupted segment for precise resume
             interrupted_segment = self.presentation_generator.get_segment(currently_displaying_segment)
             if interrupted_segment:
                 state.interrupted_segment_text = interrupted_segment.text
-                logger.info(f"Captured interrupted segment text for precise resume")
+                logger.info("Captured interrupted segment text for precise resume")
             
             state.mode = ConversationMode.RAG
             state.presentation_paused = True
@@ -82,9 +89,9 @@ class ConversationController:
             # Schedule resuming presentation if not complete
             total_segments = self.presentation_generator.get_total_segments()
             if currently_displaying_segment < total_segments - 1:
-                asyncio.create_task(self._resume_presentation_after_delay(conversation_id, 3))
+                self._schedule_resume(state, 3)
             else:
-                logger.info(f"Presentation already complete, staying in RAG mode")
+                logger.info("Presentation already complete, staying in RAG mode")
             
             return response
             
@@ -130,9 +137,9 @@ class ConversationController:
                 text=segment.text,
                 images=segment.images,
                 segment_id=segment.id,
-                category=getattr(segment, 'category', None),
-                image_strategy=getattr(segment, 'image_strategy', 'show_multiple'),
-                image_timing=getattr(segment, 'image_timing', None)
+                category=segment.category,
+                image_strategy=segment.image_strategy,
+                image_timing=segment.image_timing
             )
             
             # Add presentation segment to history
@@ -148,9 +155,9 @@ class ConversationController:
                 }
             )
             
-            logger.info(f"Presenting segment {state.current_segment} of {self.presentation_generator.get_total_segments() - 1}")
+            logger.info("Presenting segment %s of %s", state.current_segment, self.presentation_generator.get_total_segments() - 1)
             state.current_segment += 1
-            logger.info(f"Next segment will be {state.current_segment} of {self.presentation_generator.get_total_segments()}")
+            logger.info("Next segment will be %s of %s", state.current_segment, self.presentation_generator.get_total_segments())
             return response
         else:
             # Presentation finished
@@ -171,9 +178,18 @@ class ConversationController:
                 images=[]
             )
             
-    async def _resume_presentation_after_delay(self, conversation_id: str, delay: int):
-        await asyncio.sleep(delay)
+    def _schedule_resume(self, state: ConversationState, delay: int):
+        """(Re)arm the conversation's single auto-resume timer, replacing any pending one"""
+        if state.resume_handle:
+            state.resume_handle.cancel()
+        state.resume_handle = asyncio.get_running_loop().call_later(
+            delay, self._resume_presentation, state.conversation_id
+        )
+            
+    def _resume_presentation(self, conversation_id: str):
         state = self.get_state(conversation_id)
+        if state:
+            state.resume_handle = None
         if state and state.presentation_paused and state.paused_at_segment is not None:
             # Check if presentation is complete
             total_segments = self.presentation_generator.get_total_segments()
@@ -183,7 +199,7 @@ class ConversationController:
                 state.presentation_paused = False
                 state.paused_at_segment = None
                 state.interrupted_segment_text = None
-                logger.info(f"Presentation completed, staying in RAG mode")
+                logger.info("Presentation completed, staying in RAG mode")
             else:
                 # Resume from the same segment that was interrupted with the exact text
                 state.current_segment = state.paused_at_segment
@@ -191,7 +207,7 @@ class ConversationController:
                 state.presentation_paused = False
                 paused_segment = state.paused_at_segment
                 
-                logger.info(f"Resuming presentation from segment {state.current_segment} (continuing interrupted segment {paused_segment})")
+                logger.info("Resuming presentation from segment %s (continuing interrupted segment %s)", state.current_segment, paused_segment)
                 
                 # If we have the interrupted segment text, we'll send a special resume message
                 if state.interrupted_segment_text and self.restart_presentation_callback:
@@ -208,7 +224,7 @@ class ConversationController:
                         
                         # We need to send this directly to the websocket connection
                         # This will be handled by the web backend
-                        logger.info(f"Prepared resume message for interrupted segment")
+                        logger.info("Prepared resume message for interrupted segment")
                 
                 # Clear interruption state
                 state.paused_at_segment = None
@@ -219,17 +235,19 @@ class ConversationController:
                 if self.restart_presentation_callback:
                     success = self.restart_presentation_callback(conversation_id)
                     if success:
-                        logger.info(f"Successfully restarted presentation streaming for {conversation_id}")
+                        logger.info("Successfully restarted presentation streaming for %s", conversation_id)
                     else:
-                        logger.error(f"Failed to restart presentation streaming for {conversation_id}")
+                        logger.error("Failed to restart presentation streaming for %s", conversation_id)
                 else:
                     logger.warning("No restart callback available")
             
     def is_presentation_active(self, conversation_id: str) -> bool:
         state = self.get_state(conversation_id)
-        is_active = state and state.mode == ConversationMode.PRESENTATION and not state.presentation_paused
-        if state:
-            logger.debug(f"Presentation active check: mode={state.mode}, paused={state.presentation_paused}, result={is_active}")
+        if not state:
+            return False
+        is_active = state.mode == ConversationMode.PRESENTATION and not state.presentation_paused
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Presentation active check: mode=%s, paused=%s, result=%s", state.mode, state.presentation_paused, is_active)
         return is_active
     
     def get_conversation_summary(self, conversation_id: str) -> dict:
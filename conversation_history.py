@@ -1,118 +1,166 @@
-import json
 from typing import List, Dict, Optional, Any
 from datetime import datetime
+import time
 import os
 import logging
-from collections import deque
+import heapq
+from itertools import islice
+from collections import deque, OrderedDict, Counter
+import msgpack
+from json_utils import load_json_bytes
 
 logger = logging.getLogger(__name__)
 
 class ConversationHistory:
-    def __init__(self, max_history: int = 20, save_dir: str = "conversation_history"):
+    def __init__(self, max_history: int = 20, save_dir: str = "conversation_history", max_conversations: int = 10000):
         self.max_history = max_history
+        self.max_conversations = max_conversations
         self.save_dir = save_dir
-        self.history: Dict[str, deque] = {}  # conversation_id -> history deque
+        self.history: Dict[str, deque] = OrderedDict()  # conversation_id -> history deque, LRU order
+        self.formatted: Dict[str, deque] = {}  # conversation_id -> LLM-formatted messages, aligned with history
+        self.context_cache: Dict[str, tuple] = {}  # conversation_id -> (max_messages, context string); dropped on change
         self.ensure_save_dir()
         
     def ensure_save_dir(self):
         """Ensure save directory exists"""
         os.makedirs(self.save_dir, exist_ok=True)
         
+    def _evict_oldest(self):
+        """Drop least recently used conversations beyond max_conversations"""
+        while len(self.history) > self.max_conversations:
+            conversation_id, _ = self.history.popitem(last=False)
+            self.formatted.pop(conversation_id, None)
+            self.context_cache.pop(conversation_id, None)
+            
     def add_message(self, conversation_id: str, role: str, content: str, 
                    message_type: str = "text", metadata: Optional[Dict[str, Any]] = None):
         """Add a message to conversation history"""
         if conversation_id not in self.history:
             self.history[conversation_id] = deque(maxlen=self.max_history)
+            self.formatted[conversation_id] = deque(maxlen=self.max_history)
+            self._evict_oldest()
+        else:
+            self.history.move_to_end(conversation_id)
             
         message = {
             "role": role,  # "user", "assistant", "system"
             "content": content,
             "type": message_type,  # "text", "presentation", "question"
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time(),
             "metadata": metadata or {}
         }
         
         self.history[conversation_id].append(message)
+        self.formatted[conversation_id].append(self._format_message(message))
+        self.context_cache.pop(conversation_id, None)
         logger.debug(f"Added {role} message to conversation {conversation_id[:8]}...")
         
-    def get_context(self, conversation_id: str, max_messages: int = 10) -> List[Dict[str, Any]]:
-        """Get recent conversation context"""
-        if conversation_id not in self.history:
-            return []
-            
-        messages = list(self.history[conversation_id])
+    def _format_message(self, msg: Dict[str, Any]) -> str:
+        """Format a single message for the LLM context"""
+        role = msg["role"].capitalize()
+        content = msg["content"]
+        
+        # Add context about message type
+        if msg["type"] == "presentation":
+            return f"{role} (presenting): {content[:200]}..."
+        elif msg["type"] == "question":
+            return f"{role} (question): {content}"
+        elif msg["type"] == "rag_answer":
+            return f"{role} (answer): {content}"
+        else:
+            return f"{role}: {content}"
+        
+    def _select_context(self, conversation_id: str, max_messages: int) -> List[int]:
+        """Pick the indices of the history entries to use as context"""
+        messages = self.history[conversation_id]
         
         # Get last N messages, but ensure we include important context
         if len(messages) <= max_messages:
-            return messages
+            return list(range(len(messages)))
             
         # Smart context selection - prioritize questions and answers
-        important_messages = []
-        regular_messages = []
+        important_indices = []
+        regular_indices = []
         
-        for msg in messages[-max_messages*2:]:  # Look at more messages
+        start = max(0, len(messages) - max_messages*2)  # Look at more messages
+        for i, msg in enumerate(islice(messages, start, None), start):
             if msg["type"] in ["question", "rag_answer"]:
-                important_messages.append(msg)
+                important_indices.append(i)
             else:
-                regular_messages.append(msg)
+                regular_indices.append(i)
                 
         # Combine, prioritizing important messages
-        context = important_messages[-max_messages//2:] + regular_messages[-(max_messages//2):]
-        context.sort(key=lambda x: x["timestamp"])  # Keep chronological order
+        # Both index lists are already chronological, so merge instead of sorting
+        context = list(heapq.merge(important_indices[-max_messages//2:], regular_indices[-(max_messages//2):]))
         
         return context[-max_messages:]
         
-    def get_formatted_context(self, conversation_id: str, max_messages: int = 10) -> str:
-        """Get formatted context string for LLM"""
-        context = self.get_context(conversation_id, max_messages)
+    def get_context(self, conversation_id: str, max_messages: int = 10) -> List[Dict[str, Any]]:
+        """Get recent conversation context"""
+        if conversation_id not in self.history:
+            return []
+            
+        messages = self.history[conversation_id]
+        return [messages[i] for i in self._select_context(conversation_id, max_messages)]
         
-        if not context:
+    def get_formatted_context(self, conversation_id: str, max_messages: int = 10) -> str:
+        """Get formatted context string for LLM, reusing each message's pre-formatted text"""
+        if conversation_id not in self.history:
             return ""
             
-        formatted_parts = []
-        for msg in context:
-            role = msg["role"].capitalize()
-            content = msg["content"]
+        cached = self.context_cache.get(conversation_id)
+        if cached and cached[0] == max_messages:
+            return cached[1]
             
-            # Add context about message type
-            if msg["type"] == "presentation":
-                formatted_parts.append(f"{role} (presenting): {content[:200]}...")
-            elif msg["type"] == "question":
-                formatted_parts.append(f"{role} (question): {content}")
-            elif msg["type"] == "rag_answer":
-                formatted_parts.append(f"{role} (answer): {content}")
-            else:
-                formatted_parts.append(f"{role}: {content}")
-                
-        return "\n\n".join(formatted_parts)
+        formatted = self.formatted[conversation_id]
+        context = "\n\n".join(formatted[i] for i in self._select_context(conversation_id, max_messages))
+        self.context_cache[conversation_id] = (max_messages, context)
+        return context
         
     def save_conversation(self, conversation_id: str):
         """Save conversation history to file"""
         if conversation_id not in self.history:
             return
             
-        filepath = os.path.join(self.save_dir, f"{conversation_id}.json")
+        filepath = os.path.join(self.save_dir, f"{conversation_id}.msgpack")
         
         try:
-            history_list = list(self.history[conversation_id])
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(history_list, f, ensure_ascii=False, indent=2)
+            # One msgpack object per message so loading can stream them
+            packer = msgpack.Packer(use_bin_type=True)
+            with open(filepath, 'wb') as f:
+                for message in self.history[conversation_id]:
+                    f.write(packer.pack(message))
             logger.info(f"Saved conversation history to {filepath}")
         except Exception as e:
             logger.error(f"Failed to save conversation history: {e}")
             
     def load_conversation(self, conversation_id: str) -> bool:
-        """Load conversation history from file"""
-        filepath = os.path.join(self.save_dir, f"{conversation_id}.json")
+        """Load conversation history from file, falling back to the older JSON format"""
+        filepath = os.path.join(self.save_dir, f"{conversation_id}.msgpack")
+        json_filepath = os.path.join(self.save_dir, f"{conversation_id}.json")
         
         if not os.path.exists(filepath):
-            return False
+            filepath = json_filepath
+            if not os.path.exists(filepath):
+                return False
             
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                history_list = json.load(f)
+            with open(filepath, 'rb') as f:
+                if filepath == json_filepath:
+                    history = deque(load_json_bytes(f.read()), maxlen=self.max_history)
+                    for msg in history:  # Older files stored ISO timestamps
+                        if isinstance(msg["timestamp"], str):
+                            msg["timestamp"] = datetime.fromisoformat(msg["timestamp"]).timestamp()
+                else:
+                    history = deque(msgpack.Unpacker(f, raw=False), maxlen=self.max_history)
                 
-            self.history[conversation_id] = deque(history_list, maxlen=self.max_history)
+            self.history[conversation_id] = history
+            self.formatted[conversation_id] = deque(
+                (self._format_message(msg) for msg in self.history[conversation_id]),
+                maxlen=self.max_history
+            )
+            self.context_cache.pop(conversation_id, None)
+            self._evict_oldest()
             logger.info(f"Loaded conversation history from {filepath}")
             return True
         except Exception as e:
@@ -124,19 +172,26 @@ class ConversationHistory:
         if conversation_id not in self.history:
             return {"message_count": 0}
             
-        messages = list(self.history[conversation_id])
+        messages = self.history[conversation_id]
+        
+        # Count roles and types in a single pass
+        roles = Counter()
+        types = Counter()
+        for m in messages:
+            roles[m["role"]] += 1
+            types[m["type"]] += 1
         
         summary = {
             "message_count": len(messages),
-            "user_messages": sum(1 for m in messages if m["role"] == "user"),
-            "assistant_messages": sum(1 for m in messages if m["role"] == "assistant"),
-            "questions_asked": sum(1 for m in messages if m["type"] == "question"),
-            "presentation_segments": sum(1 for m in messages if m["type"] == "presentation")
+            "user_messages": roles["user"],
+            "assistant_messages": roles["assistant"],
+            "questions_asked": types["question"],
+            "presentation_segments": types["presentation"]
         }
         
         if messages:
-            summary["first_message"] = messages[0]["timestamp"]
-            summary["last_message"] = messages[-1]["timestamp"]
+            summary["first_message"] = datetime.fromtimestamp(messages[0]["timestamp"]).isoformat()
+            summary["last_message"] = datetime.fromtimestamp(messages[-1]["timestamp"]).isoformat()
             
         return summary
         
@@ -144,4 +199,6 @@ class ConversationHistory:
         """Clear conversation history"""
         if conversation_id in self.history:
             self.history[conversation_id].clear()
+            self.formatted[conversation_id].clear()
+            self.context_cache.pop(conversation_id, None)
             logger.info(f"Cleared conversation history for {conversation_id[:8]}...")
\ No newline at end of file
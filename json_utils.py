@@ -0,0 +1,25 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+def dump_json_bytes(obj: Any) -> bytes:
+    """Encode obj as indented UTF-8 JSON, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+def dump_json_key(obj: Any) -> bytes:
+    """Encode obj as compact, key-sorted UTF-8 JSON for hashing into cache keys"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def load_json_bytes(data: Union[str, bytes]) -> Any:
+    """Decode JSON text or UTF-8 bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,39 @@
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional
+import diskcache
+from json_utils import dump_json_key
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_TTL_SECONDS = 30 * 86400  # Cached completions are dropped after 30 days
+
+class LLMCache:
+    """Persistent cache of LLM completions keyed on the full request (prompt, parameters, retrieved pages)"""
+    
+    def __init__(self, cache_dir: str = ".llm_cache", expire: Optional[float] = COMPLETION_TTL_SECONDS):
+        self.cache = diskcache.Cache(cache_dir)
+        self.expire = expire  # Seconds an entry is kept; None keeps entries until evicted for size
+        
+    def key(self, messages: List[Dict[str, Any]], query: str, page_ids: List[str]) -> str:
+        """Build a stable key from the messages sent, the query and the retrieved page IDs"""
+        return hashlib.blake2b(repr((messages, query, sorted(page_ids))).encode()).hexdigest()
+    
+    def completion_key(self, params: Dict[str, Any]) -> str:
+        """Build a stable key from a full set of completion request parameters"""
+        return hashlib.sha256(dump_json_key(params)).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached completion, or None on a miss"""
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+    
+    def set(self, key: str, completion: str):
+        """Store a completion"""
+        try:
+            self.cache.set(key, completion, expire=self.expire)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
@@ -1,13 +1,17 @@
 from pydantic import BaseModel
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from enum import Enum
 import uuid
+import asyncio
 
 class ConversationMode(str, Enum):
     PRESENTATION = "presentation"
     RAG = "rag"
 
-class ConversationState(BaseModel):
+@dataclass(slots=True)
+class ConversationState:
+    """Per-conversation mutable state; internal only, so a slotted dataclass rather than a validated model"""
     conversation_id: str
     mode: ConversationMode = ConversationMode.PRESENTATION
     current_segment: int = 0
@@ -18,6 +22,7 @@ class ConversationState(BaseModel):
     interrupted_segment_text: Optional[str] = None  # Text of interrupted segment for resume
     interrupted_at_position: Optional[int] = None  # Position where interruption occurred
     created_at: Optional[float] = None
+    resume_handle: Optional[asyncio.TimerHandle] = field(default=None, repr=False, compare=False)  # Pending auto-resume
 
 class UserMessage(BaseModel):
     text: str
@@ -58,10 +63,3 @@ class WindowConfig(BaseModel):
     type: str
     size: str
     quantity: int = 1
-    
-    def dict(self):
-        return {
-            "type": self.type,
-            "size": self.size,
-            "quantity": self.quantity
-        }
\ No newline at end of file
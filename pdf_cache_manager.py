@@ -1,7 +1,10 @@
 import hashlib
 import os
-import json
 import pickle
+import zstandard as zstd
+import json
+import sqlite3
+import threading
 from typing import Dict, List, Any, Optional, Tuple
 from pdf_processor import PDFProcessor
 from vector_store import VectorStore
@@ -10,12 +13,15 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+CACHE_FORMAT_VERSION = 2  # Bump when the on-disk layout of cached entries changes
+
 class PDFCacheManager:
     def __init__(self, cache_dir: str = "pdf_cache"):
         self.cache_dir = cache_dir
-        self.cache_index_file = os.path.join(cache_dir, "cache_index.json")
+        self.cache_db_file = os.path.join(cache_dir, "pdf_cache.db")
         self.ensure_cache_dir()
-        self.cache_index = self.load_cache_index()
+        self._db_lock = threading.Lock()
+        self.db = self.open_cache_db()
         
     def ensure_cache_dir(self):
         """Ensure cache directory exists"""
@@ -24,31 +30,75 @@ class PDFCacheManager:
         os.makedirs(os.path.join(self.cache_dir, "vector_stores"), exist_ok=True)
         os.makedirs(os.path.join(self.cache_dir, "presentations"), exist_ok=True)
         
-    def load_cache_index(self) -> Dict[str, Any]:
-        """Load cache index from file"""
-        if os.path.exists(self.cache_index_file):
-            try:
-                with open(self.cache_index_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load cache index: {e}")
-        return {}
+    def open_cache_db(self) -> sqlite3.Connection:
+        """Open the SQLite cache index, creating the entries table if needed"""
+        db = sqlite3.connect(self.cache_db_file, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                files_hash TEXT PRIMARY KEY,
+                files_json TEXT,
+                paths_json TEXT,
+                pages_count INTEGER,
+                cached_at REAL,
+                processed_path TEXT,
+                vs_index TEXT,
+                vs_pkl TEXT,
+                pres_path TEXT,
+                cache_format_version INTEGER
+            )
+        """)
+        db.commit()
+        return db
     
-    def save_cache_index(self):
-        """Save cache index to file"""
-        try:
-            with open(self.cache_index_file, 'w') as f:
-                json.dump(self.cache_index, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save cache index: {e}")
+    def _get_entry(self, files_hash: str) -> Optional[Dict[str, Any]]:
+        """Look up a current-format cache entry by its combined files hash"""
+        with self._db_lock:
+            row = self.db.execute(
+                "SELECT * FROM entries WHERE files_hash = ? AND cache_format_version = ?",
+                (files_hash, CACHE_FORMAT_VERSION)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'files': json.loads(row['files_json']),
+            'file_paths': json.loads(row['paths_json']),
+            'files_hash': row['files_hash'],
+            'processed_data_path': row['processed_path'],
+            'vector_store_index': row['vs_index'],
+            'vector_store_pkl': row['vs_pkl'],
+            'presentation_path': row['pres_path'],
+            'pages_count': row['pages_count'],
+            'cached_at': row['cached_at']
+        }
+    
+    def _delete_entry(self, files_hash: str):
+        """Remove a cache entry from the index"""
+        with self._db_lock, self.db:
+            self.db.execute("DELETE FROM entries WHERE files_hash = ?", (files_hash,))
+    
+    def _dump_pickle(self, obj: Any, path: str):
+        """Pickle obj into a zstd-compressed file"""
+        with open(path, 'wb') as f, zstd.ZstdCompressor(level=3, threads=-1).stream_writer(f) as writer:
+            pickle.dump(obj, writer, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def _load_pickle(self, path: str) -> Any:
+        """Load an object written by _dump_pickle"""
+        with open(path, 'rb') as f, zstd.ZstdDecompressor().stream_reader(f) as reader:
+            return pickle.load(reader)
     
     def get_file_hash(self, file_path: str) -> str:
         """Get SHA256 hash of file content"""
-        sha256_hash = hashlib.sha256()
         try:
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(chunk)
+                if hasattr(hashlib, "file_digest"):  # Python 3.11+, hashes outside the GIL
+                    sha256_hash = hashlib.file_digest(f, "sha256")
+                else:
+                    sha256_hash = hashlib.sha256()
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        sha256_hash.update(chunk)
             file_hash = sha256_hash.hexdigest()
             logger.info(f"Hashed file {os.path.basename(file_path)}: {file_hash[:16]}...")
             return file_hash
@@ -73,8 +123,8 @@ class PDFCacheManager:
         files_hash = self.get_files_hash(file_paths)
         logger.info(f"Checking cache for combined hash: {files_hash[:16]}...")
         
-        if files_hash in self.cache_index:
-            cache_entry = self.cache_index[files_hash]
+        cache_entry = self._get_entry(files_hash)
+        if cache_entry:
             logger.info(f"Found cache entry for files: {cache_entry.get('files', [])}")
             
             # Verify all cached files still exist
@@ -93,8 +143,7 @@ class PDFCacheManager:
             else:
                 # Cache entry exists but files are missing, remove entry
                 logger.warning(f"Cache files missing: {missing_files}")
-                del self.cache_index[files_hash]
-                self.save_cache_index()
+                self._delete_entry(files_hash)
         else:
             logger.info(f"❌ No cache entry found for hash {files_hash[:16]}...")
         
@@ -106,22 +155,23 @@ class PDFCacheManager:
                                 vector_store: VectorStore, 
                                 presentation_data: Dict[str, Any],
                                 presentation_generator: PresentationGenerator,
-                                original_filenames: List[str] = None) -> str:
-        """Cache all processing results"""
-        files_hash = self.get_files_hash(file_paths)
+                                original_filenames: List[str] = None,
+                                files_hash: Optional[str] = None) -> str:
+        """Cache all processing results; pass files_hash from is_cached to skip re-hashing"""
+        if not files_hash:
+            files_hash = self.get_files_hash(file_paths)
         
         try:
             # Save processed pages data
-            processed_data_path = os.path.join(self.cache_dir, "processed_data", f"{files_hash}.pkl")
-            with open(processed_data_path, 'wb') as f:
-                pickle.dump(pages_data, f)
+            processed_data_path = os.path.join(self.cache_dir, "processed_data", f"{files_hash}.pkl.zst")
+            self._dump_pickle(pages_data, processed_data_path)
             
             # Save vector store
             vector_store_path = os.path.join(self.cache_dir, "vector_stores", files_hash)
             vector_store.save_index(vector_store_path)
             
             # Save presentation data and generator state
-            presentation_path = os.path.join(self.cache_dir, "presentations", f"{files_hash}.pkl")
+            presentation_path = os.path.join(self.cache_dir, "presentations", f"{files_hash}.pkl.zst")
             presentation_cache_data = {
                 'presentation_data': presentation_data,
                 'segments': [
@@ -140,8 +190,7 @@ class PDFCacheManager:
                 'pages_data': presentation_generator.pages_data
             }
             
-            with open(presentation_path, 'wb') as f:
-                pickle.dump(presentation_cache_data, f)
+            self._dump_pickle(presentation_cache_data, presentation_path)
             
             # Update cache index
             # Use original filenames if provided, otherwise extract from temp paths
@@ -150,19 +199,23 @@ class PDFCacheManager:
             else:
                 file_names = [os.path.basename(fp) for fp in file_paths]
             
-            self.cache_index[files_hash] = {
-                'files': file_names,
-                'file_paths': file_paths,
-                'files_hash': files_hash,
-                'processed_data_path': processed_data_path,
-                'vector_store_index': f"{vector_store_path}.index",
-                'vector_store_pkl': f"{vector_store_path}.pkl",
-                'presentation_path': presentation_path,
-                'pages_count': len(pages_data),
-                'cached_at': __import__('time').time()
-            }
+            with self._db_lock, self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        files_hash,
+                        json.dumps(file_names),
+                        json.dumps(file_paths),
+                        len(pages_data),
+                        __import__('time').time(),
+                        processed_data_path,
+                        f"{vector_store_path}.index",
+                        f"{vector_store_path}.pkl",
+                        presentation_path,
+                        CACHE_FORMAT_VERSION
+                    )
+                )
             
-            self.save_cache_index()
             logger.info(f"Cached processing results for hash {files_hash}")
             return files_hash
             
@@ -172,15 +225,13 @@ class PDFCacheManager:
     
     def load_cached_results(self, files_hash: str) -> Optional[Tuple[List[Dict[str, Any]], VectorStore, Dict[str, Any], PresentationGenerator]]:
         """Load cached processing results"""
-        if files_hash not in self.cache_index:
+        cache_entry = self._get_entry(files_hash)
+        if not cache_entry:
             return None
         
-        cache_entry = self.cache_index[files_hash]
-        
         try:
             # Load processed pages data
-            with open(cache_entry['processed_data_path'], 'rb') as f:
-                pages_data = pickle.load(f)
+            pages_data = self._load_pickle(cache_entry['processed_data_path'])
             
             # Load vector store
             vector_store = VectorStore()
@@ -189,8 +240,7 @@ class PDFCacheManager:
                 raise Exception("Failed to load vector store")
             
             # Load presentation data
-            with open(cache_entry['presentation_path'], 'rb') as f:
-                presentation_cache_data = pickle.load(f)
+            presentation_cache_data = self._load_pickle(cache_entry['presentation_path'])
             
             presentation_data = presentation_cache_data['presentation_data']
             
@@ -202,17 +252,8 @@ class PDFCacheManager:
             from models import PresentationSegment
             presentation_generator.segments = []
             for seg_data in presentation_cache_data['segments']:
-                segment = PresentationSegment(
-                    id=seg_data['id'],
-                    text=seg_data['text'],
-                    images=seg_data['images'],
-                    duration_seconds=seg_data['duration_seconds'],
-                    pdf_page=seg_data['pdf_page'],
-                    pdf_name=seg_data['pdf_name'],
-                    category=seg_data.get('category', 'general'),
-                    image_strategy=seg_data.get('image_strategy', 'show_multiple'),
-                    image_timing=seg_data.get('image_timing')
-                )
+                # Cached segments were validated when first built, so skip pydantic validation
+                segment = PresentationSegment.model_construct(**{'category': 'general', **seg_data})
                 presentation_generator.segments.append(segment)
             
             logger.info(f"Loaded cached results for hash {files_hash}: {len(pages_data)} pages, {len(presentation_generator.segments)} segments")
@@ -221,15 +262,18 @@ class PDFCacheManager:
         except Exception as e:
             logger.error(f"Failed to load cached results for hash {files_hash}: {e}")
             # Remove corrupted cache entry
-            if files_hash in self.cache_index:
-                del self.cache_index[files_hash]
-                self.save_cache_index()
+            self._delete_entry(files_hash)
             return None
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        total_entries = len(self.cache_index)
-        total_pages = sum(entry.get('pages_count', 0) for entry in self.cache_index.values())
+        with self._db_lock:
+            entries = self.db.execute(
+                "SELECT files_json, pages_count, cached_at FROM entries WHERE cache_format_version = ?",
+                (CACHE_FORMAT_VERSION,)
+            ).fetchall()
+        total_entries = len(entries)
+        total_pages = sum(entry['pages_count'] or 0 for entry in entries)
         
         # Calculate cache size
         cache_size = 0
@@ -247,11 +291,11 @@ class PDFCacheManager:
             'cache_size_mb': round(cache_size / (1024 * 1024), 2),
             'entries': [
                 {
-                    'files': entry['files'],
+                    'files': json.loads(entry['files_json']),
                     'pages_count': entry['pages_count'],
                     'cached_at': entry['cached_at']
                 }
-                for entry in self.cache_index.values()
+                for entry in entries
             ]
         }
     
@@ -259,10 +303,12 @@ class PDFCacheManager:
         """Clear all cached data"""
         try:
             import shutil
-            if os.path.exists(self.cache_dir):
-                shutil.rmtree(self.cache_dir)
-            self.ensure_cache_dir()
-            self.cache_index = {}
+            with self._db_lock:
+                self.db.close()
+                if os.path.exists(self.cache_dir):
+                    shutil.rmtree(self.cache_dir)
+                self.ensure_cache_dir()
+                self.db = self.open_cache_db()
             logger.info("Cache cleared successfully")
             return True
         except Exception as e:
@@ -271,12 +317,11 @@ class PDFCacheManager:
     
     def remove_cache_entry(self, files_hash: str) -> bool:
         """Remove specific cache entry"""
-        if files_hash not in self.cache_index:
+        cache_entry = self._get_entry(files_hash)
+        if not cache_entry:
             return False
         
         try:
-            cache_entry = self.cache_index[files_hash]
-            
             # Remove files
             files_to_remove = [
                 cache_entry.get('processed_data_path'),
@@ -290,8 +335,7 @@ class PDFCacheManager:
                     os.remove(file_path)
             
             # Remove from index
-            del self.cache_index[files_hash]
-            self.save_cache_index()
+            self._delete_entry(files_hash)
             
             logger.info(f"Removed cache entry {files_hash}")
             return True
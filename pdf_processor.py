@@ -1,17 +1,20 @@
 import fitz
 import os
-from PIL import Image
-import io
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+THUMBNAIL_WIDTH = 400  # Default width of the per-page thumbnail rendered alongside the full page
+PAGES_PER_TASK = 8  # Page-range size when splitting PDFs across worker processes
 
 class PDFProcessor:
-    def __init__(self, output_dir: str = "processed_pdfs"):
+    def __init__(self, output_dir: str = "processed_pdfs", thumbnail_width: int = THUMBNAIL_WIDTH):
         self.output_dir = output_dir
+        self.thumbnail_width = thumbnail_width
         os.makedirs(output_dir, exist_ok=True)
         
-    def extract_page_content(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract text and render full page image from each page of a PDF"""
+    def extract_page_content(self, pdf_path: str, page_numbers: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """Extract text and render full page image from each page (or the given pages) of a PDF"""
         doc = fitz.open(pdf_path)
         pages_data = []
         
@@ -19,43 +22,60 @@ class PDFProcessor:
         pdf_output_dir = os.path.join(self.output_dir, pdf_name)
         os.makedirs(pdf_output_dir, exist_ok=True)
         
-        for page_num in range(len(doc)):
+        if page_numbers is None:
+            page_numbers = range(len(doc))
+        
+        for page_num in page_numbers:
             page = doc[page_num]
             
             # Extract text
             text = page.get_text()
             
-            # Render full page as image
+            image_list = page.get_images()
+            
+            # Render full page as image; pages with embedded pictures are saved as JPEG,
+            # which encodes far faster and smaller, while text/vector-only pages stay lossless PNG
             matrix = fitz.Matrix(2.0, 2.0)  # 2x zoom for better quality
             pix = page.get_pixmap(matrix=matrix)
-            page_img_name = f"page_{page_num}_full.png"
+            page_img_name = f"page_{page_num}_full.{'jpg' if image_list else 'png'}"
             page_img_path = os.path.join(pdf_output_dir, page_img_name)
-            pix.save(page_img_path)
+            pix.save(page_img_path, jpg_quality=85)
+            pix = None
+            
+            # Render a downscaled copy straight from the page for in-chat and on-screen displays
+            thumb_scale = self.thumbnail_width / page.rect.width
+            pix = page.get_pixmap(matrix=fitz.Matrix(thumb_scale, thumb_scale))
+            thumb_img_path = os.path.join(pdf_output_dir, f"page_{page_num}_thumb_{self.thumbnail_width}.jpg")
+            pix.save(thumb_img_path, jpg_quality=80)
             pix = None
             
             # Extract individual images (optional, for backup)
-            image_list = page.get_images()
             extracted_images = []
             
             for img_index, img in enumerate(image_list):
                 try:
                     xref = img[0]
-                    pix = fitz.Pixmap(doc, xref)
                     
-                    if pix.n - pix.alpha < 4:  # GRAY or RGB
-                        img_data = pix.tobytes("png")
-                        img_name = f"page_{page_num}_img_{img_index}.png"
+                    # Browser-ready embedded images are written as stored, without decoding
+                    embedded = doc.extract_image(xref)
+                    if embedded and embedded["ext"] in ("png", "jpeg", "jpg"):
+                        img_name = f"page_{page_num}_img_{img_index}.{embedded['ext']}"
                         img_path = os.path.join(pdf_output_dir, img_name)
-                        
                         with open(img_path, "wb") as f:
-                            f.write(img_data)
-                        
-                        extracted_images.append({
-                            "image_path": img_path,
-                            "image_name": img_name
-                        })
+                            f.write(embedded["image"])
+                    else:
+                        pix = fitz.Pixmap(doc, xref)
+                        if pix.n - pix.alpha >= 4:  # CMYK and other colorspaces
+                            pix = fitz.Pixmap(fitz.csRGB, pix)
+                        img_name = f"page_{page_num}_img_{img_index}.png"
+                        img_path = os.path.join(pdf_output_dir, img_name)
+                        pix.save(img_path)
+                        pix = None
                     
-                    pix = None
+                    extracted_images.append({
+                        "image_path": img_path,
+                        "image_name": img_name
+                    })
                 except Exception as e:
                     print(f"Error extracting image {img_index} from page {page_num}: {e}")
             
@@ -65,6 +85,8 @@ class PDFProcessor:
                 "page_number": page_num,
                 "text": text.strip(),
                 "full_page_image": page_img_path,
+                "full_page_image_ok": True,  # pix.save raises on failure, so the render is on disk
+                "thumb_image": thumb_img_path,
                 "images": extracted_images,  # Keep individual images as backup
                 "page_id": f"{pdf_name}_page_{page_num}"
             }
@@ -75,18 +97,28 @@ class PDFProcessor:
         return pages_data
     
     def process_multiple_pdfs(self, pdf_paths: List[str]) -> List[Dict[str, Any]]:
-        """Process multiple PDFs and return all page data"""
-        all_pages = []
-        
+        """Process multiple PDFs in parallel worker processes and return all page data"""
+        # Split every PDF into page ranges so large single documents also use all cores;
+        # PyMuPDF is not thread-safe, so each worker process opens its own document
+        tasks = []
         for pdf_path in pdf_paths:
             try:
-                pages = self.extract_page_content(pdf_path)
-                all_pages.extend(pages)
-                print(f"Processed {len(pages)} pages from {pdf_path}")
+                with fitz.open(pdf_path) as doc:
+                    page_count = len(doc)
             except Exception as e:
                 print(f"Error processing {pdf_path}: {e}")
+                continue
+            for start in range(0, page_count, PAGES_PER_TASK):
+                tasks.append((pdf_path, range(start, min(start + PAGES_PER_TASK, page_count))))
         
-        return all_pages
+        if len(tasks) <= 1:
+            results = [process_pdf_pages(pdf_path, pages, self.output_dir) for pdf_path, pages in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as executor:
+                futures = [executor.submit(process_pdf_pages, pdf_path, pages, self.output_dir) for pdf_path, pages in tasks]
+                results = [future.result() for future in futures]
+        
+        return [page for pages in results for page in pages]
     
     def save_processed_data(self, pages_data: List[Dict[str, Any]], filename: str = "pages_data.json"):
         """Save processed data to JSON file"""
@@ -98,3 +130,23 @@ class PDFProcessor:
         return output_path
 
 
+def process_pdf_file(pdf_path: str, output_dir: str = "processed_pdfs") -> List[Dict[str, Any]]:
+    """Process a single PDF; module-level so it can run in a worker process"""
+    try:
+        pages = PDFProcessor(output_dir).extract_page_content(pdf_path)
+        print(f"Processed {len(pages)} pages from {pdf_path}")
+        return pages
+    except Exception as e:
+        print(f"Error processing {pdf_path}: {e}")
+        return []
+
+
+def process_pdf_pages(pdf_path: str, page_numbers: range, output_dir: str = "processed_pdfs") -> List[Dict[str, Any]]:
+    """Process a range of pages of a PDF; module-level so it can run in a worker process"""
+    try:
+        pages = PDFProcessor(output_dir).extract_page_content(pdf_path, page_numbers)
+        print(f"Processed pages {page_numbers.start}-{page_numbers.stop - 1} from {pdf_path}")
+        return pages
+    except Exception as e:
+        print(f"Error processing {pdf_path}: {e}")
+        return []
@@ -3,74 +3,352 @@ import os
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 from models import PresentationSegment
+from llm_cache import LLMCache
+from json_utils import load_json_bytes
 from typing import Optional
 import base64
 import logging
+import asyncio
+import json
+import hashlib
+import re
+import io
+import mimetypes
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import lru_cache
+import aiofiles
+import numpy as np
+import tiktoken
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+MAX_CONCURRENT_LLM_CALLS = 8  # Upper bound on in-flight segment content requests
+SEGMENTS_PER_BATCH = 6  # Segments whose content is generated by a single LLM call
+MAX_CACHED_TEMPERATURE = 0.3  # Completions sampled hotter than this are not reused
+MAX_CACHED_IMAGES = 64  # Encoded page images kept in memory, shared by all generators
+MAX_PAGE_INDEXES = 4  # Page indexes kept per generator, one per document being presented
+MODEL_CONTEXT_TOKENS = {"gpt-3.5-turbo": 16385, "gpt-4o-mini": 128000}  # Context windows (prompt + completion)
+MAX_CHARS_PER_TOKEN = 8  # Generous bound used to stop collecting text before tokenizing
+MAX_STRUCTURE_PROMPT_TOKENS = 16000  # Larger documents are summarized chunk by chunk before structure analysis
+STRUCTURE_CHUNK_TOKENS = 6000  # Page text per summarization call when a document is too large for one prompt
+TOKENS_PER_SLIDE = 3000  # Document tokens per slide when sizing a presentation (half that for the upper bound)
+MIN_ANALYZED_PAGES = 4  # Shorter documents get the rule-based outline without a structure analysis call
+MIN_ANALYZED_TOKENS = 500  # Documents with less text than this get the rule-based outline too
+MIN_SEGMENTED_PAGE_TOKENS = 300  # A single-page slide with less text than this becomes one segment without a call
+
+# Invariant instructions for segment content calls. Kept byte-identical and first in every request,
+# with the segment-specific details in the user message, so the provider can cache the prompt prefix.
+SEGMENT_CONTENT_SYSTEM_MSG = """Create brief presentation content for a segment of a document. Be concise since viewers can see detailed images.
+
+Requirements:
+- Create concise content (2-3 sentences) about the segment's specific topic only
+- Highlight the most important feature or benefit
+- Use the actual product name from the source material
+- Keep it brief since viewers can see the detailed image
+- Focus on what makes this product unique or valuable
+- Adapt tone based on the document type given in the request
+
+Write as natural, brief speaking content that complements the visual information."""
+
+SEGMENT_BATCH_SYSTEM_MSG = SEGMENT_CONTENT_SYSTEM_MSG + """
+
+You will be given several segments as JSON, each with an id, title, focus and page content. Write content for each segment separately.
+Always answer in JSON: {"segments": [{"id": <segment id>, "content": "<content>"}, ...]}"""
+
+
+_image_data_urls: "OrderedDict[tuple, str]" = OrderedDict()  # (path, mtime_ns) -> data URL
+
+# Called with each slide as a streamed structure reply completes it. A context variable rather than generator
+# state, so concurrent runs sharing a generator each stream to their own queue (asyncio.to_thread copies it).
+_slide_callback: ContextVar = ContextVar('slide_callback', default=None)
+# While set, uncached _cached_completion requests in this context are collected for a Batch API job instead of sent
+_batch_collector: ContextVar = ContextVar('batch_collector', default=None)
+
+# Transient OpenAI failures worth retrying; anything else is raised straight to the caller's fallback
+RETRYABLE_OPENAI_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIError,
+    openai.error.Timeout,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+)
+_retry_transient = retry(
+    stop=stop_after_attempt(4),
+    wait=wait_random_exponential(min=1, max=30),
+    retry=retry_if_exception_type(RETRYABLE_OPENAI_ERRORS),
+    reraise=True
+)
+
+@_retry_transient
+def _chat_with_retry(**params):
+    """openai.ChatCompletion.create with up to 3 retries and jittered exponential backoff"""
+    return openai.ChatCompletion.create(**params)
+
+@_retry_transient
+async def _achat_with_retry(**params):
+    """Async variant of _chat_with_retry"""
+    return await openai.ChatCompletion.acreate(**params)
+
+@lru_cache(maxsize=None)
+def _token_encoding(model: str = "gpt-3.5-turbo") -> "tiktoken.Encoding":
+    """Tokenizer for a completion model, loaded on first use"""
+    return tiktoken.encoding_for_model(model)
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> str:
+    """Cut text to at most max_tokens model tokens"""
+    encoding = _token_encoding(model)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+def completion_budget(messages: List[Dict[str, str]], max_tokens: int, model: str = "gpt-3.5-turbo") -> int:
+    """Largest completion size up to max_tokens that still fits the model's context window after the prompt"""
+    encoding = _token_encoding(model)
+    prompt_tokens = sum(len(encoding.encode(m['content'])) + 4 for m in messages)
+    return min(max_tokens, MODEL_CONTEXT_TOKENS[model] - prompt_tokens - 50)
+
+class BatchDeferred(Exception):
+    """Raised instead of calling the API while uncached requests are being collected for a Batch API job"""
+
+class JsonArrayItemStream:
+    """Incrementally pulls complete objects out of the JSON array under `key` while the JSON text streams in"""
+    
+    def __init__(self, key: str):
+        self.array_start = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self.buffer = ""
+        self.pos: Optional[int] = None  # Next character to scan, once the array has been found
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.item_start = 0
+        
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Add streamed text and return the array items it completed"""
+        self.buffer += text
+        items = []
+        if self.pos is None:
+            match = self.array_start.search(self.buffer)
+            if not match:
+                return items
+            self.pos = match.end()
+        
+        while not self.done and self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                if self.depth == 0:
+                    self.item_start = self.pos
+                self.depth += 1
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        items.append(load_json_bytes(self.buffer[self.item_start:self.pos + 1]))
+                    except ValueError:
+                        pass  # Malformed item; the full reply is parsed again once complete
+            elif char == ']' and self.depth == 0:
+                self.done = True
+            self.pos += 1
+        return items
+
 class PresentationGenerator:
+    ANALYSIS_MODEL = os.getenv("OPENAI_ANALYSIS_MODEL", "gpt-4o-mini")  # Structure detection and segmentation: JSON-shaped output
+    CONTENT_MODEL = os.getenv("OPENAI_CONTENT_MODEL", "gpt-3.5-turbo")  # Spoken segment content
+    
     def __init__(self):
         openai.api_key = os.getenv("OPENAI_API_KEY")
         self.segments: List[PresentationSegment] = []
+        self._segments_by_id: Dict[int, PresentationSegment] = {}
+        self._total_duration = 0
         self.pages_data: List[Dict[str, Any]] = []
-        
+        self.response_cache = LLMCache()
+        # id(pages_data) -> (pages_data, pages by number, has-image and text-length arrays indexed by page number)
+        self._page_indexes: "OrderedDict[int, tuple]" = OrderedDict()
+        self._page_index_lock = threading.Lock()
+        
+    def _cached_completion(self, **params) -> str:
+        """Run a chat completion, reusing a stored result for identical low-temperature requests"""
+        cacheable = params.get('temperature', 1.0) <= MAX_CACHED_TEMPERATURE
+        cache_key = self.response_cache.completion_key(params)
+        if cacheable:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        batch_requests = _batch_collector.get()
+        if batch_requests is not None:
+            batch_requests.append(params)
+            raise BatchDeferred("queued for the Batch API")
+        
+        response = _chat_with_retry(**params)
+        if self._truncated_json(response, params):
+            response = _chat_with_retry(**{**params, 'max_tokens': params['max_tokens'] * 2})
+        self._log_cached_prompt_tokens(response)
+        content = response.choices[0].message['content']
+        if cacheable:
+            self.response_cache.set(cache_key, content)
+        return content
+    
+    def _truncated_json(self, response, params: Dict[str, Any]) -> bool:
+        """Whether a JSON-mode reply was cut off by max_tokens and so cannot be parsed"""
+        truncated = (params.get('response_format', {}).get('type') == 'json_object'
+                     and response.choices[0].get('finish_reason') == 'length')
+        if truncated:
+            logger.debug("✂️ JSON reply hit max_tokens=%s, retrying with %s", params['max_tokens'], params['max_tokens'] * 2)
+        return truncated
+    
+    def _log_cached_prompt_tokens(self, response):
+        """Log how much of the prompt OpenAI served from its prefix cache"""
+        usage = response.get('usage') or {}
+        cached_tokens = (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+        logger.info("Prompt cache: %s of %s prompt tokens cached", cached_tokens, usage.get('prompt_tokens', 0))
+    
+    def _cached_completion_streaming(self, on_slide, **params) -> str:
+        """Like _cached_completion, but streams the reply and calls on_slide with each "slides" element as soon as it is complete"""
+        cacheable = params.get('temperature', 1.0) <= MAX_CACHED_TEMPERATURE
+        cache_key = self.response_cache.completion_key(params)
+        slide_stream = JsonArrayItemStream('slides')
+        if cacheable:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                for slide_info in slide_stream.feed(cached):
+                    on_slide(slide_info)
+                return cached
+        
+        chunks = []
+        for chunk in _chat_with_retry(stream=True, **params):
+            if 'choices' in chunk and len(chunk['choices']) > 0:
+                delta = chunk['choices'][0].get('delta', {})
+                if 'content' in delta:
+                    chunks.append(delta['content'])
+                    for slide_info in slide_stream.feed(delta['content']):
+                        on_slide(slide_info)
+        
+        content = "".join(chunks)
+        if cacheable:
+            self.response_cache.set(cache_key, content)
+        return content
+    
+    async def _acached_completion(self, **params) -> str:
+        """Async variant of _cached_completion"""
+        cacheable = params.get('temperature', 1.0) <= MAX_CACHED_TEMPERATURE
+        cache_key = self.response_cache.completion_key(params)
+        if cacheable:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        response = await _achat_with_retry(**params)
+        if self._truncated_json(response, params):
+            response = await _achat_with_retry(**{**params, 'max_tokens': params['max_tokens'] * 2})
+        self._log_cached_prompt_tokens(response)
+        content = response.choices[0].message['content']
+        if cacheable:
+            self.response_cache.set(cache_key, content)
+        return content
+    
     def analyze_pdf_structure(self, pages_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze the PDF structure to create presentation outline"""
+        """Analyze the PDF structure to create presentation outline (call from a thread without a running event loop)"""
+        return asyncio.run(self.aanalyze_pdf_structure(pages_data))
+    
+    async def aanalyze_pdf_structure(self, pages_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Async variant of analyze_pdf_structure"""
         
-        print(f"\n🔍 STARTING AI-DRIVEN PDF ANALYSIS:")
-        print(f"📄 Total PDF pages: {len(pages_data)}")
+        logger.debug("🔍 STARTING AI-DRIVEN PDF ANALYSIS:")
+        logger.debug("📄 Total PDF pages: %s", len(pages_data))
+        
+        # Too little content for the model to improve on the rule-based outline
+        if pages_data and (len(pages_data) < MIN_ANALYZED_PAGES
+                           or sum(self._page_token_count(page) for page in pages_data) < MIN_ANALYZED_TOKENS):
+            logger.debug("📏 Small document, using the rule-based outline")
+            return self._create_smart_fallback(pages_data)
+        
+        # Same document text as an earlier run: reuse its structure without rebuilding the prompt
+        structure_key = self._document_key('structure_analysis', pages_data)
+        cached_structure = self.response_cache.get(structure_key)
+        if cached_structure is not None:
+            logger.debug("♻️ Reusing structure analysis of an identical document")
+            return load_json_bytes(cached_structure)
         
         # Build complete document content for AI analysis
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)  # Skip building per-page previews nobody will see
         total_pages = len(pages_data)
-        full_content = ""
-        page_summaries = []
+        content_parts = []
+        page_tokens = []
         
         for i, page in enumerate(pages_data):
             page_text = page.get('text', '')
             page_num = page.get('page_number', i+1)
-            has_image = bool(page.get('full_page_image'))
             
-            print(f"\n📖 PAGE {page_num} ANALYSIS:")
-            print(f"  📝 Text length: {len(page_text)} characters")
-            print(f"  🖼️ Has image: {'✓' if has_image else '✗'}")
+            if debug_enabled:
+                logger.debug("📖 PAGE %s ANALYSIS:", page_num)
+                logger.debug("  📝 Text length: %s characters, %s tokens", len(page_text), self._page_token_count(page))
+                logger.debug("  🖼️ Has image: %s", '✓' if page.get('full_page_image') else '✗')
             
             if page_text:
-                # Show first 200 chars of each page
-                preview = page_text[:200].replace('\n', ' ').strip()
-                print(f"  📄 Content preview: {preview}...")
+                if debug_enabled:
+                    # Show first 200 chars of each page
+                    preview = page_text[:200].replace('\n', ' ').strip()
+                    logger.debug("  📄 Content preview: %s...", preview)
                 
                 # Add to full content with clear page markers
-                full_content += f"\n--- PAGE {page_num} ---\n{page_text}\n"
-                
-                # Create page summary for AI
-                page_summaries.append({
-                    "page": page_num,
-                    "content_length": len(page_text),
-                    "has_image": has_image,
-                    "preview": page_text[:300] + "..." if len(page_text) > 300 else page_text
-                })
+                content_parts.append(f"\n--- PAGE {page_num} ---\n{page_text}\n")
+                page_tokens.append(self._page_token_count(page))
             else:
-                print(f"  ⚠️ No text content found on page {page_num}")
+                logger.debug("  ⚠️ No text content found on page %s", page_num)
         
-        print(f"📊 Document statistics:")
-        print(f"  - Total pages: {total_pages}")
-        print(f"  - Pages with text: {len([p for p in page_summaries if p['content_length'] > 0])}")
-        print(f"  - Pages with images: {len([p for p in page_summaries if p['has_image']])}")
+        full_content = "".join(content_parts)
+        content_heading = "COMPLETE DOCUMENT CONTENT"
         
-        # Send EVERYTHING to AI for intelligent analysis
-        analysis_prompt = f"""
-        You are analyzing a {total_pages}-page product catalog/document. Your task is to create a comprehensive presentation structure that covers ALL content systematically.
-
-        COMPLETE DOCUMENT CONTENT:
+        # Size the presentation by tokens, not characters: tables and product codes tokenize densely
+        total_tokens = sum(page_tokens)
+        min_slides = min(25, max(8, total_tokens // TOKENS_PER_SLIDE))
+        max_slides = min(25, max(min_slides, total_tokens * 2 // TOKENS_PER_SLIDE))
+        
+        # Too long for one prompt: summarize page chunks in parallel and plan the slides from the summaries
+        if total_tokens > MAX_STRUCTURE_PROMPT_TOKENS:
+            chunks = self._pack_content_chunks(content_parts, page_tokens)
+            logger.debug("✂️ Document has %s tokens, summarizing it in %s chunks", total_tokens, len(chunks))
+            try:
+                full_content = "\n".join(await self._asummarize_content_chunks(chunks))
+                content_heading = "DOCUMENT SUMMARY (page by page, condensed from the full text)"
+            except Exception as e:
+                logger.warning("⚠️ Chunk summarization failed, analyzing truncated content instead: %s", e)
+                full_content = truncate_to_tokens(full_content, MAX_STRUCTURE_PROMPT_TOKENS, self.ANALYSIS_MODEL)
+                content_heading = "DOCUMENT CONTENT (truncated)"
+        
+        if debug_enabled:
+            logger.debug("📊 Document statistics:")
+            logger.debug("  - Total pages: %s", total_pages)
+            _, page_has_image, page_text_len = self._page_index(pages_data)
+            logger.debug("  - Pages with text: %s", np.count_nonzero(page_text_len))
+            logger.debug("  - Pages with images: %s", np.count_nonzero(page_has_image))
+        
+        # Send EVERYTHING to AI for intelligent analysis; the document leads so repeat calls share a cacheable prefix
+        analysis_prompt = f"""{content_heading}:
         {full_content}
 
+        You are analyzing the {total_pages}-page product catalog/document above. Your task is to create a comprehensive presentation structure that covers ALL content systematically.
+
         TASK: Create a presentation that covers the ENTIRE document comprehensively. 
 
         REQUIREMENTS:
         1. Analyze ALL content and identify natural sections/topics
-        2. Create enough slides to cover everything important (aim for {max(8, total_pages // 6)} to {min(25, total_pages // 4)} slides)
+        2. Create enough slides to cover everything important (aim for {min_slides} to {max_slides} slides)
         3. Group related pages together intelligently 
         4. Ensure each major topic/product gets adequate coverage
         5. Don't skip content - be comprehensive
@@ -102,80 +380,124 @@ class PresentationGenerator:
         Be thorough - this should be a comprehensive presentation covering the entire document!
         """
         
-        print(f"\n🤖 SENDING TO AI FOR ANALYSIS:")
-        print(f"  📊 Total content size: {len(full_content)} characters")
-        print(f"  📋 Sample content being sent to AI (first 500 chars):")
-        print(f"     {full_content[:500]}")
-        print(f"  🎯 Requesting {max(8, total_pages // 6)} to {min(25, total_pages // 4)} slides")
+        logger.debug("🤖 SENDING TO AI FOR ANALYSIS:")
+        logger.debug("  📊 Total content size: %s characters", len(full_content))
+        logger.debug("  📋 Sample content being sent to AI (first 500 chars):")
+        logger.debug("     %s", full_content[:500])
+        logger.debug("  🎯 Requesting %s to %s slides for %s tokens", min_slides, max_slides, total_tokens)
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert presentation analyst. Create comprehensive, intelligent slide structures that cover entire documents systematically. Always output valid JSON."},
-                    {"role": "user", "content": analysis_prompt}
-                ],
-                max_tokens=4000,
-                temperature=0.1
+            messages = [
+                {"role": "system", "content": "You are an expert presentation analyst. Create comprehensive, intelligent slide structures that cover entire documents systematically. Always output valid JSON."},
+                {"role": "user", "content": analysis_prompt}
+            ]
+            content = await self._acached_completion(
+                model=self.ANALYSIS_MODEL,
+                messages=messages,
+                max_tokens=completion_budget(messages, 2048, self.ANALYSIS_MODEL),
+                temperature=0.1,
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message['content']
-            print(f"\n🧠 AI RESPONSE RECEIVED:")
-            print(f"  📊 Response length: {len(content)} characters")
-            print(f"  📋 Raw AI response (first 1000 chars):")
-            print(f"     {content[:1000]}...")
-            
-            # Extract JSON from response
-            import json
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                json_content = json_match.group()
-                print(f"\n📝 EXTRACTED JSON ({len(json_content)} chars):")
-                print(f"     {json_content[:500]}...")
-                
-                structure = json.loads(json_content)
-                slides_count = len(structure.get('slides', []))
-                print(f"\n✅ AI SUCCESSFULLY GENERATED {slides_count} SLIDES for {total_pages} pages")
-                print(f"📊 Title: {structure.get('title', 'Unknown')}")
-                print(f"📊 Subtitle: {structure.get('subtitle', 'Unknown')}")
-                
-                # Show detailed slide breakdown
-                print(f"\n📋 DETAILED AI-GENERATED SLIDE STRUCTURE:")
+            logger.debug("🧠 AI RESPONSE RECEIVED:")
+            logger.debug("  📊 Response length: %s characters", len(content))
+            logger.debug("  📋 Raw AI response (first 1000 chars):")
+            logger.debug("     %s...", content[:1000])
+            
+            # Parse JSON response; JSON mode makes the whole reply one object
+            logger.debug("📝 JSON RESPONSE (%s chars):", len(content))
+            logger.debug("     %s...", content[:500])
+            
+            structure = load_json_bytes(content)
+            self.response_cache.set(structure_key, content)
+            slides_count = len(structure.get('slides', []))
+            logger.debug("✅ AI SUCCESSFULLY GENERATED %s SLIDES for %s pages", slides_count, total_pages)
+            logger.debug("📊 Title: %s", structure.get('title', 'Unknown'))
+            logger.debug("📊 Subtitle: %s", structure.get('subtitle', 'Unknown'))
+            
+            # Show detailed slide breakdown
+            if debug_enabled:
+                logger.debug("📋 DETAILED AI-GENERATED SLIDE STRUCTURE:")
                 for i, slide in enumerate(structure.get('slides', [])):
                     focus = slide.get('focus_area', 'Unknown')
                     pages = slide.get('relevant_pages', [])
                     category = slide.get('category', 'general')
                     summary = slide.get('content_summary', 'No summary')
-                    print(f"\n  🎯 SLIDE {i+1}: {focus}")
-                    print(f"     Category: {category}")
-                    print(f"     Pages: {pages}")
-                    print(f"     Summary: {summary}")
-                
-                return structure
-            else:
-                print("❌ Could not parse AI JSON response")
-                return self._create_smart_fallback(pages_data)
-                
+                    logger.debug("  🎯 SLIDE %s: %s", i+1, focus)
+                    logger.debug("     Category: %s", category)
+                    logger.debug("     Pages: %s", pages)
+                    logger.debug("     Summary: %s", summary)
+            
+            return structure
+            
         except Exception as e:
-            print(f"❌ AI analysis failed: {e}")
+            logger.error("❌ AI analysis failed: %s", e)
             return self._create_smart_fallback(pages_data)
     
+    def _page_token_count(self, page: Dict[str, Any]) -> int:
+        """Token count of a page's text for the analysis model, stored on the page dict after the first count"""
+        token_count = page.get('token_count')
+        if token_count is None:
+            token_count = page['token_count'] = len(_token_encoding(self.ANALYSIS_MODEL).encode(page.get('text', '')))
+        return token_count
+    
+    def _pack_content_chunks(self, content_parts: List[str], part_tokens: List[int]) -> List[str]:
+        """Greedily pack consecutive page texts into chunks of at most STRUCTURE_CHUNK_TOKENS tokens"""
+        chunks = []
+        current: List[str] = []
+        current_tokens = 0
+        for part, tokens in zip(content_parts, part_tokens):
+            if current and current_tokens + tokens > STRUCTURE_CHUNK_TOKENS:
+                chunks.append("".join(current))
+                current, current_tokens = [], 0
+            # A single oversized page becomes its own chunk, cut to fit
+            current.append(truncate_to_tokens(part, STRUCTURE_CHUNK_TOKENS, self.ANALYSIS_MODEL) if tokens > STRUCTURE_CHUNK_TOKENS else part)
+            current_tokens += min(tokens, STRUCTURE_CHUNK_TOKENS)
+        if current:
+            chunks.append("".join(current))
+        return chunks
+    
+    async def _asummarize_content_chunks(self, chunks: List[str]) -> List[str]:
+        """Summarize document chunks concurrently, keeping their page markers so slides can cite pages"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+        
+        async def summarize(chunk: str) -> str:
+            async with semaphore:
+                return await self._acached_completion(
+                    model=self.ANALYSIS_MODEL,
+                    messages=[
+                        {"role": "system", "content": "Summarize document pages for presentation planning. For every page, keep its '--- PAGE N ---' marker and list its topic, products, and key facts in one or two lines."},
+                        {"role": "user", "content": chunk}
+                    ],
+                    max_tokens=800,
+                    temperature=0.1
+                )
+        
+        return await asyncio.gather(*[summarize(chunk) for chunk in chunks])
+    
     def detect_pdf_structure(self, pages_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Dynamically detect PDF structure and content type"""
         
         total_pages = len(pages_data)
-        full_content = self._build_complete_content(pages_data)
         
-        print(f"\n🔍 ADAPTIVE STRUCTURE DETECTION for {total_pages} pages")
-        print(f"📊 Content size: {len(full_content)} characters")
+        # Same document text as an earlier run: reuse its detected structure
+        structure_key = self._document_key('structure_detection', pages_data)
+        cached_structure = self.response_cache.get(structure_key)
+        if cached_structure is not None:
+            logger.debug("♻️ Reusing structure detection of an identical %s-page document", total_pages)
+            return load_json_bytes(cached_structure)
+        
+        full_content = self._build_complete_content(pages_data, max_tokens=2000)
+        
+        logger.debug("🔍 ADAPTIVE STRUCTURE DETECTION for %s pages", total_pages)
+        logger.debug("📊 Content size: %s characters", len(full_content))
         
         # AI-driven structure detection
         detection_prompt = f"""
         Analyze this {total_pages}-page document and determine its structure and content type.
         
-        DOCUMENT CONTENT (first 8000 characters):
-        {full_content[:8000]}
+        DOCUMENT CONTENT (first 2000 tokens):
+        {full_content}
         
         ANALYSIS TASKS:
         1. CONTENT TYPE DETECTION:
@@ -219,52 +541,59 @@ class PresentationGenerator:
         """
         
         try:
-            print(f"🤖 SENDING TO AI FOR STRUCTURE DETECTION...")
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
+            logger.debug("🤖 SENDING TO AI FOR STRUCTURE DETECTION...")
+            content = self._cached_completion(
+                model=self.ANALYSIS_MODEL,
                 messages=[
                     {"role": "system", "content": "You are an expert document analyzer. Analyze document structure and determine optimal presentation strategy. Always output valid JSON."},
                     {"role": "user", "content": detection_prompt}
                 ],
                 max_tokens=1000,
-                temperature=0.1
+                temperature=0.1,
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message['content']
-            print(f"📝 Structure detection response: {content[:300]}...")
+            logger.debug("📝 Structure detection response: %s...", content[:300])
             
             # Parse JSON response
-            import json
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                structure = json.loads(json_match.group())
-                
-                print(f"\n✅ STRUCTURE DETECTED:")
-                print(f"  📋 Document type: {structure.get('document_type', 'unknown')}")
-                print(f"  🔄 Content pattern: {structure.get('content_pattern', 'unknown')}")
-                print(f"  📊 Complexity score: {structure.get('complexity_score', 5)}/10")
-                print(f"  🎯 Recommended slides: {structure.get('optimal_strategy', {}).get('recommended_slides', 'unknown')}")
-                print(f"  📄 Pages per slide: {structure.get('optimal_strategy', {}).get('pages_per_slide', 'unknown')}")
-                
-                return structure
-            else:
-                print("❌ Could not parse structure detection JSON")
-                return self._create_fallback_structure(pages_data)
-                
+            structure = load_json_bytes(content)
+            self.response_cache.set(structure_key, content)
+            
+            logger.debug("✅ STRUCTURE DETECTED:")
+            logger.debug("  📋 Document type: %s", structure.get('document_type', 'unknown'))
+            logger.debug("  🔄 Content pattern: %s", structure.get('content_pattern', 'unknown'))
+            logger.debug("  📊 Complexity score: %s/10", structure.get('complexity_score', 5))
+            logger.debug("  🎯 Recommended slides: %s", structure.get('optimal_strategy', {}).get('recommended_slides', 'unknown'))
+            logger.debug("  📄 Pages per slide: %s", structure.get('optimal_strategy', {}).get('pages_per_slide', 'unknown'))
+            
+            return structure
+            
         except Exception as e:
-            print(f"❌ Structure detection failed: {e}")
+            logger.error("❌ Structure detection failed: %s", e)
             return self._create_fallback_structure(pages_data)
     
-    def _build_complete_content(self, pages_data: List[Dict[str, Any]]) -> str:
-        """Build complete document content for analysis"""
-        full_content = ""
+    def _document_key(self, kind: str, pages_data: List[Dict[str, Any]]) -> str:
+        """Cache key for a per-document analysis result, derived from the page numbers and text"""
+        digest = hashlib.sha256(f"{kind}\0{self.ANALYSIS_MODEL}".encode())
+        for page in pages_data:
+            digest.update(f"\0{page.get('page_number')}\0{page.get('text', '')}".encode())
+        return f"{kind}:{digest.hexdigest()}"
+    
+    def _build_complete_content(self, pages_data: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> str:
+        """Build document content for analysis, cut to max_tokens model tokens"""
+        limit = max_tokens * MAX_CHARS_PER_TOKEN if max_tokens is not None else None
+        parts, total = [], 0
         for i, page in enumerate(pages_data):
             page_text = page.get('text', '')
             page_num = page.get('page_number', i+1)
             if page_text:
-                full_content += f"\n--- PAGE {page_num} ---\n{page_text}\n"
-        return full_content
+                part = f"\n--- PAGE {page_num} ---\n{page_text}\n"
+                parts.append(part)
+                total += len(part)
+                if limit is not None and total >= limit:
+                    break
+        full_content = "".join(parts)
+        return truncate_to_tokens(full_content, max_tokens) if max_tokens is not None else full_content
     
     def _create_fallback_structure(self, pages_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Create fallback structure when AI detection fails"""
@@ -296,12 +625,12 @@ class PresentationGenerator:
         complexity = structure_analysis.get('complexity_score', 5)
         pages_are_standalone = structure_analysis.get('structure_detected', {}).get('pages_are_standalone', False)
         
-        print(f"\n📊 CALCULATING OPTIMAL SLIDES:")
-        print(f"  📄 Total pages: {total_pages}")
-        print(f"  📋 Document type: {document_type}")
-        print(f"  🔄 Content pattern: {content_pattern}")
-        print(f"  📊 Complexity: {complexity}/10")
-        print(f"  🎯 Standalone pages: {pages_are_standalone}")
+        logger.debug("📊 CALCULATING OPTIMAL SLIDES:")
+        logger.debug("  📄 Total pages: %s", total_pages)
+        logger.debug("  📋 Document type: %s", document_type)
+        logger.debug("  🔄 Content pattern: %s", content_pattern)
+        logger.debug("  📊 Complexity: %s/10", complexity)
+        logger.debug("  🎯 Standalone pages: %s", pages_are_standalone)
         
         # Page size categories with different strategies
         if total_pages <= 15:
@@ -330,8 +659,8 @@ class PresentationGenerator:
             strategy = "content_groups"
             pages_per_slide = 2
         
-        print(f"  🔧 Small PDF strategy: {strategy}")
-        print(f"  📊 Slides: {slide_count}, Pages per slide: {pages_per_slide}")
+        logger.debug("  🔧 Small PDF strategy: %s", strategy)
+        logger.debug("  📊 Slides: %s, Pages per slide: %s", slide_count, pages_per_slide)
         
         return {
             "slide_count": slide_count,
@@ -356,8 +685,8 @@ class PresentationGenerator:
             strategy = "topic_grouping"
             pages_per_slide = "2-4"
         
-        print(f"  🔧 Medium PDF strategy: {strategy}")
-        print(f"  📊 Slides: {slide_count}, Pages per slide: {pages_per_slide}")
+        logger.debug("  🔧 Medium PDF strategy: %s", strategy)
+        logger.debug("  📊 Slides: %s, Pages per slide: %s", slide_count, pages_per_slide)
         
         return {
             "slide_count": slide_count,
@@ -382,8 +711,8 @@ class PresentationGenerator:
             strategy = "topic_condensation"
             pages_per_slide = "4-6"
         
-        print(f"  🔧 Large PDF strategy: {strategy}")
-        print(f"  📊 Slides: {slide_count}, Pages per slide: {pages_per_slide}")
+        logger.debug("  🔧 Large PDF strategy: %s", strategy)
+        logger.debug("  📊 Slides: %s, Pages per slide: %s", slide_count, pages_per_slide)
         
         return {
             "slide_count": slide_count,
@@ -407,8 +736,8 @@ class PresentationGenerator:
             strategy = "high_level_overview"
             pages_per_slide = "6-10"
         
-        print(f"  🔧 XLarge PDF strategy: {strategy}")
-        print(f"  📊 Slides: {slide_count}, Pages per slide: {pages_per_slide}")
+        logger.debug("  🔧 XLarge PDF strategy: %s", strategy)
+        logger.debug("  📊 Slides: %s, Pages per slide: %s", slide_count, pages_per_slide)
         
         return {
             "slide_count": slide_count,
@@ -421,7 +750,7 @@ class PresentationGenerator:
         
         document_type = structure_analysis.get('document_type', 'mixed_content')
         
-        print(f"\n🎯 CONTENT-TYPE SPECIFIC PROCESSING: {document_type}")
+        logger.debug("🎯 CONTENT-TYPE SPECIFIC PROCESSING: %s", document_type)
         
         processors = {
             'product_catalog': self._process_product_catalog,
@@ -441,13 +770,13 @@ class PresentationGenerator:
         slide_count = slide_config.get('slide_count', 10)
         pages_are_standalone = analysis.get('structure_detected', {}).get('pages_are_standalone', False)
         
-        print(f"🛍️ PRODUCT CATALOG PROCESSING:")
-        print(f"  📄 {total_pages} pages → {slide_count} product-focused slides")
-        print(f"  🎯 Pages are standalone: {pages_are_standalone}")
+        logger.debug("🛍️ PRODUCT CATALOG PROCESSING:")
+        logger.debug("  📄 %s pages → %s product-focused slides", total_pages, slide_count)
+        logger.debug("  🎯 Pages are standalone: %s", pages_are_standalone)
         
         # For product catalogs with standalone pages, create one slide per page
         if pages_are_standalone:
-            print(f"  📄 Creating individual slides for each product page")
+            logger.debug("  📄 Creating individual slides for each product page")
             slides = []
             for i, page in enumerate(pages_data):
                 slides.append({
@@ -470,7 +799,7 @@ class PresentationGenerator:
             catalog_prompt = f"""
             This is a product catalog with {total_pages} pages. Create product-focused slides.
             
-            CONTENT: {self._build_complete_content(pages_data)[:6000]}
+            CONTENT: {self._build_complete_content(pages_data, max_tokens=1500)}
             
             PRODUCT CATALOG APPROACH:
             1. Identify individual products or product groups
@@ -504,13 +833,13 @@ class PresentationGenerator:
         
         slide_count = slide_config.get('slide_count', 15)
         
-        print(f"📊 TECHNICAL REPORT PROCESSING:")
-        print(f"  📄 Technical document → {slide_count} topic-based slides")
+        logger.debug("📊 TECHNICAL REPORT PROCESSING:")
+        logger.debug("  📄 Technical document → %s topic-based slides", slide_count)
         
         report_prompt = f"""
         This is a technical report/document. Create technical topic-focused slides.
         
-        CONTENT: {self._build_complete_content(pages_data)[:6000]}
+        CONTENT: {self._build_complete_content(pages_data, max_tokens=1500)}
         
         TECHNICAL REPORT APPROACH:
         1. Identify main technical topics and sections
@@ -530,13 +859,13 @@ class PresentationGenerator:
         
         slide_count = slide_config.get('slide_count', 12)
         
-        print(f"📖 USER MANUAL PROCESSING:")
-        print(f"  📄 Manual → {slide_count} instructional slides")
+        logger.debug("📖 USER MANUAL PROCESSING:")
+        logger.debug("  📄 Manual → %s instructional slides", slide_count)
         
         manual_prompt = f"""
         This is a user manual. Create instructional slides.
         
-        CONTENT: {self._build_complete_content(pages_data)[:6000]}
+        CONTENT: {self._build_complete_content(pages_data, max_tokens=1500)}
         
         USER MANUAL APPROACH:
         1. Follow logical instructional flow
@@ -554,13 +883,13 @@ class PresentationGenerator:
         
         slide_count = slide_config.get('slide_count', 8)
         
-        print(f"📄 BROCHURE PROCESSING:")
-        print(f"  📄 Marketing material → {slide_count} promotional slides")
+        logger.debug("📄 BROCHURE PROCESSING:")
+        logger.debug("  📄 Marketing material → %s promotional slides", slide_count)
         
         brochure_prompt = f"""
         This is a brochure/marketing material. Create promotional slides.
         
-        CONTENT: {self._build_complete_content(pages_data)[:6000]}
+        CONTENT: {self._build_complete_content(pages_data, max_tokens=1500)}
         
         BROCHURE APPROACH:
         1. Follow marketing flow: intro → features → benefits → conclusion
@@ -578,13 +907,13 @@ class PresentationGenerator:
         
         slide_count = slide_config.get('slide_count', 10)
         
-        print(f"🔄 MIXED CONTENT PROCESSING:")
-        print(f"  📄 Diverse content → {slide_count} adaptive slides")
+        logger.debug("🔄 MIXED CONTENT PROCESSING:")
+        logger.debug("  📄 Diverse content → %s adaptive slides", slide_count)
         
         mixed_prompt = f"""
         This document has mixed content types. Create adaptive slides.
         
-        CONTENT: {self._build_complete_content(pages_data)[:6000]}
+        CONTENT: {self._build_complete_content(pages_data, max_tokens=1500)}
         
         MIXED CONTENT APPROACH:
         1. Analyze content sections and adapt strategy per section
@@ -602,8 +931,8 @@ class PresentationGenerator:
         
         slide_count = slide_config.get('slide_count', 10)
         
-        print(f"⚙️ GENERIC PROCESSING:")
-        print(f"  📄 Unknown type → {slide_count} general slides")
+        logger.debug("⚙️ GENERIC PROCESSING:")
+        logger.debug("  📄 Unknown type → %s general slides", slide_count)
         
         # Fall back to original logic
         return self.analyze_pdf_structure(pages_data)
@@ -612,34 +941,32 @@ class PresentationGenerator:
         """Helper to call AI with specialized prompts"""
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
+            params = dict(
+                model=self.ANALYSIS_MODEL,
                 messages=[
                     {"role": "system", "content": f"You are an expert in creating presentations from {doc_type} documents. Create structured slide layouts that match the document type. Always output valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=3000,
-                temperature=0.1
+                temperature=0.1,
+                response_format={"type": "json_object"}
             )
+            slide_callback = _slide_callback.get()
+            if slide_callback is not None:
+                content = self._cached_completion_streaming(slide_callback, **params)
+            else:
+                content = self._cached_completion(**params)
             
-            content = response.choices[0].message['content']
-            print(f"📝 {doc_type} processing response: {content[:200]}...")
+            logger.debug("📝 %s processing response: %s...", doc_type, content[:200])
             
             # Parse JSON response
-            import json
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                structure = json.loads(json_match.group())
-                slides_count = len(structure.get('slides', []))
-                print(f"✅ Created {slides_count} specialized slides for {doc_type}")
-                return structure
-            else:
-                print(f"❌ Could not parse {doc_type} JSON response")
-                return self._create_fallback_structure_for_type(doc_type, slide_count)
-                
+            structure = load_json_bytes(content)
+            slides_count = len(structure.get('slides', []))
+            logger.debug("✅ Created %s specialized slides for %s", slides_count, doc_type)
+            return structure
+            
         except Exception as e:
-            print(f"❌ {doc_type} processing failed: {e}")
+            logger.error("❌ %s processing failed: %s", doc_type, e)
             return self._create_fallback_structure_for_type(doc_type, slide_count)
     
     def _create_fallback_structure_for_type(self, doc_type: str, slide_count: int) -> Dict:
@@ -675,6 +1002,7 @@ class PresentationGenerator:
         total_pages = len(pages_data)
         target_slides = max(6, min(20, total_pages // 5))  # Reasonable slide count
         pages_per_slide = max(2, total_pages // target_slides)
+        target_slides = min(target_slides, -(-total_pages // pages_per_slide))  # No slides without pages
         
         slides = []
         for i in range(target_slides):
@@ -712,7 +1040,7 @@ class PresentationGenerator:
         strategy = structure_analysis.get('optimal_strategy', {}).get('segmentation_approach', 'adaptive')
         document_type = structure_analysis.get('document_type', 'mixed_content')
         
-        print(f"\n🎯 ADAPTIVE SEGMENTATION: {strategy} for {document_type}")
+        logger.debug("🎯 ADAPTIVE SEGMENTATION: %s for %s", strategy, document_type)
         
         segmentation_strategies = {
             'one_per_page': self._segment_one_per_page,
@@ -730,7 +1058,7 @@ class PresentationGenerator:
         segments = []
         requested_pages = slide_info.get('relevant_pages', [])
         
-        print(f"📄 ONE-PER-PAGE SEGMENTATION for pages: {requested_pages}")
+        logger.debug("📄 ONE-PER-PAGE SEGMENTATION for pages: %s", requested_pages)
         
         for page_num in requested_pages:
             page_data = self._get_page_data(page_num, pages_data)
@@ -767,7 +1095,7 @@ class PresentationGenerator:
         
         relevant_pages = self._get_relevant_pages_data(slide_info, pages_data)
         
-        print(f"🏷️ TOPIC-BASED SEGMENTATION for {len(relevant_pages)} pages")
+        logger.debug("🏷️ TOPIC-BASED SEGMENTATION for %s pages", len(relevant_pages))
         
         topic_prompt = f"""
         Analyze these pages and group them by related topics:
@@ -790,7 +1118,7 @@ class PresentationGenerator:
         
         relevant_pages = self._get_relevant_pages_data(slide_info, pages_data)
         
-        print(f"🔄 FLOW-BASED SEGMENTATION for {len(relevant_pages)} pages")
+        logger.debug("🔄 FLOW-BASED SEGMENTATION for %s pages", len(relevant_pages))
         
         flow_prompt = f"""
         Analyze content flow and create logical segments:
@@ -816,10 +1144,10 @@ class PresentationGenerator:
         document_type = analysis.get('document_type', 'mixed_content')
         pages_are_standalone = analysis.get('structure_detected', {}).get('pages_are_standalone', False)
         
-        print(f"🧠 ADAPTIVE SEGMENTATION:")
-        print(f"  📊 Complexity: {content_density}/10")
-        print(f"  📋 Type: {document_type}")
-        print(f"  🎯 Standalone: {pages_are_standalone}")
+        logger.debug("🧠 ADAPTIVE SEGMENTATION:")
+        logger.debug("  📊 Complexity: %s/10", content_density)
+        logger.debug("  📋 Type: %s", document_type)
+        logger.debug("  🎯 Standalone: %s", pages_are_standalone)
         
         adaptive_prompt = f"""
         Analyze this content and determine optimal segmentation:
@@ -848,12 +1176,44 @@ class PresentationGenerator:
         
         return self._ai_guided_segmentation(adaptive_prompt, relevant_pages)
     
+    def _page_index(self, pages_data: List[Dict]) -> tuple:
+        """Page index for a document: (pages by number, has-image array, text-length array), built once per pages_data.
+        
+        Kept per document so concurrent runs on one generator never read another document's index.
+        """
+        with self._page_index_lock:
+            entry = self._page_indexes.get(id(pages_data))
+            if entry is not None and entry[0] is pages_data:
+                self._page_indexes.move_to_end(id(pages_data))
+                return entry[1:]
+            
+            pages_by_number: Dict[int, List[Dict]] = {}
+            for page in pages_data:
+                pages_by_number.setdefault(page.get('page_number'), []).append(page)
+            
+            # Per-page columns for document statistics; pages sharing a number are combined
+            numbered = [number for number in pages_by_number if isinstance(number, int) and number >= 0]
+            page_count = max(numbered, default=-1) + 1
+            page_has_image = np.zeros(page_count, dtype=bool)
+            page_text_len = np.zeros(page_count, dtype=np.int64)
+            for number in numbered:
+                for page in pages_by_number[number]:
+                    page_has_image[number] |= bool(page.get('full_page_image'))
+                    page_text_len[number] += len(page.get('text', ''))
+            
+            self._page_indexes[id(pages_data)] = (pages_data, pages_by_number, page_has_image, page_text_len)
+            if len(self._page_indexes) > MAX_PAGE_INDEXES:
+                self._page_indexes.popitem(last=False)
+            return pages_by_number, page_has_image, page_text_len
+    
+    def _pages_by_number(self, pages_data: List[Dict]) -> Dict[int, List[Dict]]:
+        """Index pages by page number (several PDFs can share a number)"""
+        return self._page_index(pages_data)[0]
+    
     def _get_page_data(self, page_num: int, pages_data: List[Dict]) -> Dict:
         """Get data for specific page number"""
-        for page in pages_data:
-            if page.get('page_number') == page_num:
-                return page
-        return None
+        matches = self._pages_by_number(pages_data).get(page_num)
+        return matches[0] if matches else None
     
     def _get_relevant_pages_data(self, slide_info: Dict, pages_data: List[Dict]) -> List[Dict]:
         """Get relevant pages data for slide"""
@@ -872,38 +1232,29 @@ class PresentationGenerator:
     
     def _combine_pages_content(self, pages_data: List[Dict]) -> str:
         """Combine content from multiple pages"""
-        combined = ""
-        for page in pages_data:
-            page_text = page.get('text', '')
-            page_num = page.get('page_number', 0)
-            combined += f"PAGE {page_num}:\n{page_text}\n\n"
-        return combined
+        return "".join(
+            f"PAGE {page.get('page_number', 0)}:\n{page.get('text', '')}\n\n"
+            for page in pages_data
+        )
     
     def _get_ai_segment_analysis(self, prompt: str, pages_data: List[Dict]) -> Dict:
         """Get AI analysis for segment"""
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
+            content = self._cached_completion(
+                model=self.ANALYSIS_MODEL,
                 messages=[
                     {"role": "system", "content": "Analyze content and create focused segments. Always output valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
-                temperature=0.1
+                temperature=0.1,
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message['content']
+            return load_json_bytes(content)
             
-            import json
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return self._create_single_segment_fallback(pages_data)
-                
         except Exception as e:
-            print(f"❌ Segment analysis failed: {e}")
+            logger.error("❌ Segment analysis failed: %s", e)
             return self._create_single_segment_fallback(pages_data)
     
     def _ai_guided_segmentation(self, prompt: str, pages_data: List[Dict]) -> List[Dict]:
@@ -924,32 +1275,25 @@ class PresentationGenerator:
             }
             """
             
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
+            content = self._cached_completion(
+                model=self.ANALYSIS_MODEL,
                 messages=[
                     {"role": "system", "content": "You are an expert content analyzer. Create intelligent segments based on content structure. Always output valid JSON with segments array."},
                     {"role": "user", "content": enhanced_prompt}
                 ],
-                max_tokens=1500,
-                temperature=0.1
+                max_tokens=768,
+                temperature=0.1,
+                response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message['content']
+            segmentation = load_json_bytes(content)
+            segments = segmentation.get('segments', [])
+            
+            logger.debug("✅ AI created %s focused segments", len(segments))
+            return segments
             
-            import json
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                segmentation = json.loads(json_match.group())
-                segments = segmentation.get('segments', [])
-                
-                print(f"✅ AI created {len(segments)} focused segments")
-                return segments
-            else:
-                return [self._create_single_segment_fallback(pages_data)]
-                
         except Exception as e:
-            print(f"❌ AI segmentation failed: {e}")
+            logger.error("❌ AI segmentation failed: %s", e)
             return [self._create_single_segment_fallback(pages_data)]
     
     def _create_single_segment_fallback(self, pages_data: List[Dict]) -> Dict:
@@ -962,51 +1306,57 @@ class PresentationGenerator:
             "content_summary": "Information from multiple pages"
         }
     
-    def _segment_content_intelligently(self, slide_info: Dict, pages_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Use AI to intelligently segment content into focused segments"""
+    async def _asegment_content_intelligently(self, slide_info: Dict, pages_data: List[Dict[str, Any]],
+                                              semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        """Use AI to intelligently segment content into focused segments; the semaphore caps concurrent LLM calls"""
         
         slide_num = slide_info.get('slide_number', 0)
         focus_area = slide_info.get('focus_area', 'Unknown')
-        print(f"\n🧠 AI SEGMENTATION FOR SLIDE {slide_num}: {focus_area}")
+        logger.debug("🧠 AI SEGMENTATION FOR SLIDE %s: %s", slide_num, focus_area)
         
         # Get relevant pages
         relevant_pages = []
         requested_pages = slide_info.get('relevant_pages', [])
-        print(f"📄 Analyzing pages: {requested_pages}")
+        logger.debug("📄 Analyzing pages: %s", requested_pages)
         
+        pages_by_number = self._pages_by_number(pages_data)
         for page_num in requested_pages:
-            for page in pages_data:
-                if page['page_number'] == page_num:
-                    relevant_pages.append(page)
-                    page_text = page.get('text', '')
-                    preview = page_text[:100].replace('\n', ' ') if page_text else 'No text'
-                    print(f"  📖 Page {page_num}: {len(page_text)} chars - {preview}...")
+            for page in pages_by_number.get(page_num, []):
+                relevant_pages.append(page)
+                page_text = page.get('text', '')
+                preview = page_text[:100].replace('\n', ' ') if page_text else 'No text'
+                logger.debug("  📖 Page %s: %s chars - %s...", page_num, len(page_text), preview)
         
         if not relevant_pages:
             relevant_pages = pages_data[:3]
-            print(f"⚠️ Using fallback: pages 1-3")
+            logger.warning("⚠️ Using fallback: pages 1-3")
+        
+        # One short page leaves nothing to split
+        if len(relevant_pages) == 1 and self._page_token_count(relevant_pages[0]) < MIN_SEGMENTED_PAGE_TOKENS:
+            logger.debug("📏 Single short page, keeping it as one segment")
+            return self._create_single_segment(slide_info, relevant_pages)
         
         # Combine content for AI analysis
-        combined_content = ""
+        content_parts = []
         page_details = []
         for page in relevant_pages:
             page_text = page.get('text', '')
-            combined_content += f"PAGE {page['page_number']}:\n{page_text}\n\n"
+            content_parts.append(f"PAGE {page['page_number']}:\n{page_text}\n\n")
             page_details.append({
                 "page_number": page['page_number'],
                 "content_length": len(page_text),
                 "has_image": bool(page.get('full_page_image'))
             })
+        combined_content = "".join(content_parts)
         
-        print(f"📊 Total content: {len(combined_content)} characters across {len(relevant_pages)} pages")
-        
-        # Ask AI to intelligently segment the content
-        segmentation_prompt = f"""
-        Analyze this content and intelligently create focused segments based on the document structure.
+        logger.debug("📊 Total content: %s characters across %s pages", len(combined_content), len(relevant_pages))
         
-        CONTENT TO SEGMENT:
+        # Ask AI to intelligently segment the content; the page content leads so repeat calls share a cacheable prefix
+        segmentation_prompt = f"""CONTENT TO SEGMENT:
         {combined_content}
         
+        Analyze this content and intelligently create focused segments based on the document structure.
+        
         PAGE DETAILS:
         {page_details}
         
@@ -1042,41 +1392,35 @@ class PresentationGenerator:
         """
         
         try:
-            print(f"🤖 REQUESTING AI SEGMENTATION...")
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert content analyzer. Analyze document structure and create intelligent segments. If each page is a distinct product/item, create individual segments. If pages flow together, group them logically. Let the content structure guide you. Always output valid JSON."},
-                    {"role": "user", "content": segmentation_prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.1
-            )
+            logger.debug("🤖 REQUESTING AI SEGMENTATION...")
+            async with semaphore:
+                content = await self._acached_completion(
+                    model=self.ANALYSIS_MODEL,
+                    messages=[
+                        {"role": "system", "content": "You are an expert content analyzer. Analyze document structure and create intelligent segments. If each page is a distinct product/item, create individual segments. If pages flow together, group them logically. Let the content structure guide you. Always output valid JSON."},
+                        {"role": "user", "content": segmentation_prompt}
+                    ],
+                    max_tokens=768,
+                    temperature=0.1,
+                    response_format={"type": "json_object"}
+                )
             
-            content = response.choices[0].message['content']
-            print(f"📝 AI segmentation response: {content[:300]}...")
+            logger.debug("📝 AI segmentation response: %s...", content[:300])
             
             # Parse JSON response
-            import json
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                segmentation = json.loads(json_match.group())
-                segments = segmentation.get('segments', [])
-                
-                print(f"✅ AI CREATED {len(segments)} FOCUSED SEGMENTS:")
-                for i, seg in enumerate(segments):
-                    print(f"  🎯 Segment {i+1}: {seg.get('segment_title', 'Unknown')}")
-                    print(f"     📄 Pages: {seg.get('relevant_pages', [])}")
-                    print(f"     🏷️ Topic: {seg.get('main_topic', 'No topic')}")
-                
-                return segments
-            else:
-                print("❌ Could not parse AI segmentation JSON")
-                return self._create_single_segment(slide_info, relevant_pages)
-                
+            segmentation = load_json_bytes(content)
+            segments = segmentation.get('segments', [])
+            
+            logger.debug("✅ AI CREATED %s FOCUSED SEGMENTS:", len(segments))
+            for i, seg in enumerate(segments):
+                logger.debug("  🎯 Segment %s: %s", i+1, seg.get('segment_title', 'Unknown'))
+                logger.debug("     📄 Pages: %s", seg.get('relevant_pages', []))
+                logger.debug("     🏷️ Topic: %s", seg.get('main_topic', 'No topic'))
+            
+            return segments
+            
         except Exception as e:
-            print(f"❌ AI segmentation failed: {e}")
+            logger.error("❌ AI segmentation failed: %s", e)
             return self._create_single_segment(slide_info, relevant_pages)
     
     def _create_single_segment(self, slide_info: Dict, relevant_pages: List[Dict]) -> List[Dict]:
@@ -1088,37 +1432,51 @@ class PresentationGenerator:
             "content_summary": slide_info.get('content_summary', 'Product information and details')
         }]
 
-    def generate_slide_content(self, slide_info: Dict, pages_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Generate detailed content segments for a slide using AI segmentation"""
+    async def agenerate_slide_content(self, slide_info: Dict, pages_data: List[Dict[str, Any]],
+                                      semaphore: asyncio.Semaphore,
+                                      image_tasks: Optional[Dict[str, asyncio.Future]] = None) -> List[Dict[str, Any]]:
+        """Generate detailed content segments for a slide using AI segmentation, all segments concurrently.
+        
+        Page images are loaded while the segment content is generated; pass the same image_tasks dict
+        for every slide so each image is read once.
+        """
+        if image_tasks is None:
+            image_tasks = {}
         
         # First, intelligently segment the content
-        segments = self._segment_content_intelligently(slide_info, pages_data)
+        segments = await self._asegment_content_intelligently(slide_info, pages_data, semaphore)
         
-        slide_segments = []
+        pages_by_number = self._pages_by_number(pages_data)
         
-        for seg_idx, segment in enumerate(segments):
-            print(f"\n🎯 GENERATING SEGMENT {seg_idx + 1}: {segment.get('segment_title', 'Unknown')}")
+        async def generate_segment(seg_idx: int, segment: Dict) -> Optional[Dict[str, Any]]:
+            logger.debug("🎯 GENERATING SEGMENT %s: %s", seg_idx + 1, segment.get('segment_title', 'Unknown'))
             
             # Get pages for this specific segment
             segment_pages = []
             for page_num in segment.get('relevant_pages', []):
-                for page in pages_data:
-                    if page['page_number'] == page_num:
-                        segment_pages.append(page)
-                        print(f"  📖 Using page {page_num}: {len(page.get('text', ''))} chars")
+                for page in pages_by_number.get(page_num, []):
+                    segment_pages.append(page)
+                    logger.debug("  📖 Using page %s: %s chars", page_num, len(page.get('text', '')))
             
             if not segment_pages:
-                print(f"⚠️ No pages found for segment, skipping")
-                continue
+                logger.warning("⚠️ No pages found for segment, skipping")
+                return None
+            
+            # Start reading the segment's images now so disk I/O overlaps the LLM call below
+            image_paths = [page['full_page_image'] for page in segment_pages if page.get('full_page_image')]
+            for path in image_paths:
+                if path not in image_tasks:
+                    image_tasks[path] = asyncio.ensure_future(self._aload_image(path))
+            
+            async def loaded_images() -> Dict[str, Any]:
+                results = await asyncio.gather(*[image_tasks[path] for path in image_paths], return_exceptions=True)
+                return dict(zip(image_paths, results))
             
             # Build segment content
-            segment_content = ""
-            for page in segment_pages:
-                page_text = page.get('text', '')
-                segment_content += f"Page {page['page_number']}: {page_text}\n"
+            segment_content = self._segment_page_content(segment_pages)
             
-            print(f"📊 Segment content: {len(segment_content)} characters")
-            print(f"🤖 FULL CONTENT for segment (not truncated): {len(segment_content)} chars")
+            logger.debug("📊 Segment content: %s characters", len(segment_content))
+            logger.debug("🤖 FULL CONTENT for segment (not truncated): %s chars", len(segment_content))
             
             # Generate focused content for this segment
             content_prompt = f"""
@@ -1141,62 +1499,82 @@ class PresentationGenerator:
             """
             
             try:
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": f"Create brief presentation content for one specific topic. Be concise since viewers can see detailed images."},
-                        {"role": "user", "content": content_prompt}
-                    ],
-                    max_tokens=100,
-                    temperature=0.2
-                )
-                
-                generated_content = response.choices[0].message['content']
+                async with semaphore:
+                    generated_content = await self._acached_completion(
+                        model=self.CONTENT_MODEL,
+                        messages=[
+                            {"role": "system", "content": f"Create brief presentation content for one specific topic. Be concise since viewers can see detailed images."},
+                            {"role": "user", "content": content_prompt}
+                        ],
+                        max_tokens=100,
+                        temperature=0.2
+                    )
                 
-                print(f"✅ GENERATED FOCUSED CONTENT:")
-                print(f"   📝 Content ({len(generated_content)} chars): {generated_content[:150]}...")
-                print(f"   📄 Pages: {[p.get('page_number') for p in segment_pages]}")
-                print(f"   🖼️ Images: {sum(1 for p in segment_pages if p.get('full_page_image'))}")
+                logger.debug("✅ GENERATED FOCUSED CONTENT:")
+                logger.debug("   📝 Content (%s chars): %s...", len(generated_content), generated_content[:150])
+                logger.debug("   📄 Pages: %s", [p.get('page_number') for p in segment_pages])
+                logger.debug("   🖼️ Images: %s", sum(1 for p in segment_pages if p.get('full_page_image')))
                 
-                slide_segments.append({
+                return {
                     "slide_number": f"{slide_info['slide_number']}.{seg_idx + 1}",
                     "title": segment.get('segment_title', 'Content'),
                     "content": generated_content,
                     "relevant_pages": segment_pages,
                     "has_images": any(page.get('full_page_image') for page in segment_pages),
+                    "image_urls": await loaded_images(),
                     "category": slide_info.get('category', 'general'),
                     "image_strategy": slide_info.get('image_strategy', 'show_multiple')
-                })
+                }
                 
             except Exception as e:
-                print(f"❌ Error generating segment content: {e}")
+                logger.error("❌ Error generating segment content: %s", e)
                 # Create fallback content for this segment
                 fallback_content = f"Here we explore {segment.get('segment_title', 'important features')} as detailed in our catalog pages."
-                slide_segments.append({
+                return {
                     "slide_number": f"{slide_info['slide_number']}.{seg_idx + 1}",
                     "title": segment.get('segment_title', 'Content'),
                     "content": fallback_content,
                     "relevant_pages": segment_pages,
                     "has_images": any(page.get('full_page_image') for page in segment_pages),
+                    "image_urls": await loaded_images(),
                     "category": slide_info.get('category', 'general'),
                     "image_strategy": slide_info.get('image_strategy', 'show_multiple')
-                })
+                }
+        
+        generated = await asyncio.gather(*[generate_segment(seg_idx, segment) for seg_idx, segment in enumerate(segments)])
+        slide_segments = [slide_segment for slide_segment in generated if slide_segment is not None]
         
-        print(f"\n🎉 CREATED {len(slide_segments)} FOCUSED SEGMENTS from slide {slide_info['slide_number']}")
+        logger.debug("🎉 CREATED %s FOCUSED SEGMENTS from slide %s", len(slide_segments), slide_info['slide_number'])
         return slide_segments
     
     def create_full_presentation(self, pages_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Create a complete presentation from PDF pages using adaptive processing"""
+        return asyncio.run(self.acreate_full_presentation(pages_data))
+    
+    async def acreate_full_presentation(self, pages_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Async variant of create_full_presentation for callers already running an event loop"""
         
         # Store pages data for later use
         self.pages_data = pages_data
         
-        return self.create_adaptive_presentation(pages_data)
+        return await self.acreate_adaptive_presentation(pages_data)
+    
+    def create_full_presentation_batch(self, pages_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create a presentation with segment content generated through the OpenAI Batch API.
+        
+        Half the price of live calls but may take up to 24h; meant for background ingestion.
+        """
+        self.pages_data = pages_data
+        return asyncio.run(self.acreate_adaptive_presentation(pages_data, use_batch_api=True))
     
     def create_adaptive_presentation(self, pages_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generic presentation creation that adapts to any PDF type and size"""
+        return asyncio.run(self.acreate_adaptive_presentation(pages_data))
+    
+    async def acreate_adaptive_presentation(self, pages_data: List[Dict[str, Any]], use_batch_api: bool = False) -> Dict[str, Any]:
+        """Generic presentation creation; segment content is generated with concurrent LLM calls"""
         
-        print(f"🔍 ADAPTIVE PROCESSING: Analyzing {len(pages_data)}-page document")
+        logger.debug("🔍 ADAPTIVE PROCESSING: Analyzing %s-page document", len(pages_data))
         
         # Step 1: Detect document structure and type
         structure_analysis = self.detect_pdf_structure(pages_data)
@@ -1204,134 +1582,377 @@ class PresentationGenerator:
         # Step 2: Calculate optimal slides based on analysis
         slide_config = self.calculate_optimal_slides(structure_analysis, pages_data)
         
-        # Step 3: Process using content-type specific logic
-        presentation_structure = self.process_by_content_type(structure_analysis, slide_config, pages_data)
+        if use_batch_api:
+            segment_jobs, generated_contents, segment_images = await self._abuild_segments_with_batch_api(
+                structure_analysis, slide_config, pages_data)
+        else:
+            segment_jobs, generated_contents, segment_images = await self._abuild_segments_streaming(
+                structure_analysis, slide_config, pages_data)
+        
+        # Speaking time for every segment in one pass: ~150 words per minute, minimum 8 seconds
+        word_counts = np.fromiter((len(content.split()) for content in generated_contents),
+                                  dtype=np.int32, count=len(generated_contents))
+        durations = np.maximum(8, word_counts / 2.5)
+        
+        # Convert to PresentationSegments in plan order
+        self.segments = [
+            self._create_presentation_segment(segment_info, segment_pages, generated_content, segment_counter, slide_info, images, float(duration))
+            for segment_counter, ((segment_info, segment_pages, slide_info), generated_content, images, duration)
+            in enumerate(zip(segment_jobs, generated_contents, segment_images, durations))
+        ]
+        self._index_segments()
+        
+        logger.debug("🎉 ADAPTIVE PRESENTATION COMPLETE!")
+        logger.debug("📊 Final Statistics:")
+        logger.debug("  - Total adaptive segments: %s", len(self.segments))
+        logger.debug("  - Total duration: %s seconds", self.get_total_duration())
+        logger.debug("  - Document type: %s", structure_analysis.get('document_type', 'unknown'))
+        logger.debug("  - Processing strategy: %s", slide_config.get('strategy', 'unknown'))
         
-        print(f"\n🔧 CREATING ADAPTIVE PRESENTATION SEGMENTS...")
+        return self._build_final_presentation(structure_analysis, slide_config)
+    
+    def _plan_slide_segments(self, slide_number: int, slide_info: Dict, pages_data: List[Dict[str, Any]],
+                             structure_analysis: Dict) -> List[tuple]:
+        """Split one slide into (segment_info, segment_pages, slide_info) jobs using the adaptive strategy"""
+        logger.debug("📋 Processing slide %s with adaptive segmentation", slide_number)
         
-        # Step 4: Generate segments using adaptive strategy
-        self.segments = []
-        segment_counter = 0
+        # Get multiple focused segments for this slide using adaptive strategy
+        slide_segments = self.adaptive_segmentation(slide_info, pages_data, structure_analysis)
         
-        for i, slide_info in enumerate(presentation_structure.get('slides', [])):
-            print(f"\n📋 Processing slide {i+1}/{len(presentation_structure.get('slides', []))} with adaptive segmentation")
+        segment_jobs = []
+        for seg_idx, segment_info in enumerate(slide_segments):
+            logger.debug("🎯 PLANNING SEGMENT %s: %s", seg_idx + 1, segment_info.get('segment_title', 'Unknown'))
             
-            # Get multiple focused segments for this slide using adaptive strategy
-            slide_segments = self.adaptive_segmentation(slide_info, pages_data, structure_analysis)
+            # Get pages for this specific segment
+            segment_pages = []
+            for page_num in segment_info.get('relevant_pages', []):
+                page_data = self._get_page_data(page_num, pages_data)
+                if page_data:
+                    segment_pages.append(page_data)
+                    logger.debug("  📖 Using page %s: %s chars", page_num, len(page_data.get('text', '')))
             
-            # Generate content for each segment and convert to PresentationSegment
-            for seg_idx, segment_info in enumerate(slide_segments):
-                print(f"\n🎯 GENERATING SEGMENT {seg_idx + 1}: {segment_info.get('segment_title', 'Unknown')}")
-                
-                # Get pages for this specific segment
-                segment_pages = []
-                for page_num in segment_info.get('relevant_pages', []):
-                    page_data = self._get_page_data(page_num, pages_data)
-                    if page_data:
-                        segment_pages.append(page_data)
-                        print(f"  📖 Using page {page_num}: {len(page_data.get('text', ''))} chars")
-                
-                if not segment_pages:
-                    print(f"⚠️ No pages found for segment, skipping")
-                    continue
-                
-                # Generate focused content for this segment
-                generated_content = self._generate_segment_content(segment_info, segment_pages, structure_analysis)
-                
-                # Convert to PresentationSegment
-                presentation_segment = self._create_presentation_segment(
-                    segment_info, segment_pages, generated_content, segment_counter, slide_info
+            if not segment_pages:
+                logger.warning("⚠️ No pages found for segment, skipping")
+                continue
+            
+            segment_jobs.append((segment_info, segment_pages, slide_info))
+        return segment_jobs
+    
+    async def _abuild_segments_with_batch_api(self, structure_analysis: Dict, slide_config: Dict,
+                                              pages_data: List[Dict[str, Any]]) -> tuple:
+        """Plan every slide, then generate all segment content in one Batch API job"""
+        presentation_structure = await asyncio.to_thread(
+            self.process_by_content_type, structure_analysis, slide_config, pages_data)
+        slides = presentation_structure.get('slides', [])
+        
+        # Dry-run segmentation to collect every uncached segmentation request, then run them all as one batch
+        segmentation_requests: List[Dict[str, Any]] = []
+        collector_token = _batch_collector.set(segmentation_requests)
+        try:
+            for slide_info in slides:
+                self.adaptive_segmentation(slide_info, pages_data, structure_analysis)
+        finally:
+            _batch_collector.reset(collector_token)
+        if segmentation_requests:
+            logger.debug("📦 SUBMITTING %s SEGMENTATION REQUESTS AS ONE BATCH...", len(segmentation_requests))
+            await self._arun_batch(segmentation_requests, "segmentation")
+        
+        # Planning now reads the segmentation results from the completion cache
+        logger.debug("🔧 CREATING ADAPTIVE PRESENTATION SEGMENTS...")
+        segment_jobs = [
+            job
+            for i, slide_info in enumerate(slides)
+            for job in self._plan_slide_segments(i + 1, slide_info, pages_data, structure_analysis)
+        ]
+        
+        # Start reading segment images now so disk I/O overlaps the batch job
+        image_loads = asyncio.gather(*[
+            self._aload_segment_images(segment_info, segment_pages)
+            for segment_info, segment_pages, _ in segment_jobs
+        ])
+        
+        logger.debug("🤖 GENERATING CONTENT FOR %s SEGMENTS...", len(segment_jobs))
+        generated_contents = await self._agenerate_contents_with_batch_api(segment_jobs, structure_analysis)
+        return segment_jobs, generated_contents, await image_loads
+    
+    async def _abuild_slide(self, slide_number: int, slide_info: Dict, pages_data: List[Dict[str, Any]],
+                            structure_analysis: Dict, semaphore: asyncio.Semaphore) -> List[tuple]:
+        """Plan one slide's segments, then generate their content and load their images concurrently"""
+        segment_jobs = await asyncio.to_thread(
+            self._plan_slide_segments, slide_number, slide_info, pages_data, structure_analysis)
+        
+        # Start reading segment images now so disk I/O overlaps the LLM calls below
+        image_loads = asyncio.gather(*[
+            self._aload_segment_images(segment_info, segment_pages)
+            for segment_info, segment_pages, _ in segment_jobs
+        ])
+        
+        # Several segments per call, batches concurrently
+        batch_contents = await asyncio.gather(*[
+            self._agenerate_segment_batch(segment_jobs[start:start + SEGMENTS_PER_BATCH], structure_analysis, semaphore)
+            for start in range(0, len(segment_jobs), SEGMENTS_PER_BATCH)
+        ])
+        generated_contents = [content for contents in batch_contents for content in contents]
+        return list(zip(segment_jobs, generated_contents, await image_loads))
+    
+    async def _abuild_segments_streaming(self, structure_analysis: Dict, slide_config: Dict,
+                                         pages_data: List[Dict[str, Any]]) -> tuple:
+        """Stream the slide structure and start building each slide as soon as it has been generated"""
+        
+        loop = asyncio.get_running_loop()
+        streamed_slides: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+        self._pages_by_number(pages_data)  # Build the page index before worker threads read it
+        
+        slides_started: List[Dict] = []
+        slide_tasks: List[asyncio.Task] = []
+        
+        def start_slide(slide_info: Dict):
+            slides_started.append(slide_info)
+            slide_tasks.append(asyncio.ensure_future(self._abuild_slide(
+                len(slides_started), slide_info, pages_data, structure_analysis, semaphore)))
+        
+        # Step 3: Process using content-type specific logic; completed slides are handed over while the reply streams
+        logger.debug("🔧 CREATING ADAPTIVE PRESENTATION SEGMENTS...")
+        callback_token = _slide_callback.set(
+            lambda slide_info: loop.call_soon_threadsafe(streamed_slides.put_nowait, slide_info))
+        try:
+            structure_task = asyncio.ensure_future(asyncio.to_thread(
+                self.process_by_content_type, structure_analysis, slide_config, pages_data))
+            while not structure_task.done():
+                next_slide = asyncio.ensure_future(streamed_slides.get())
+                await asyncio.wait({next_slide, structure_task}, return_when=asyncio.FIRST_COMPLETED)
+                if next_slide.done():
+                    start_slide(next_slide.result())
+                else:
+                    next_slide.cancel()
+            while not streamed_slides.empty():
+                start_slide(streamed_slides.get_nowait())
+            presentation_structure = structure_task.result()
+        finally:
+            _slide_callback.reset(callback_token)
+        
+        # The parsed reply normally matches what was streamed; if it fell back to another structure, start over
+        final_slides = presentation_structure.get('slides', [])
+        if final_slides[:len(slides_started)] != slides_started:
+            logger.warning("⚠️ Final slide structure differs from the streamed slides, rebuilding")
+            for task in slide_tasks:
+                task.cancel()
+            await asyncio.gather(*slide_tasks, return_exceptions=True)
+            slides_started, slide_tasks = [], []
+        for slide_info in final_slides[len(slides_started):]:
+            start_slide(slide_info)
+        
+        built = [segment for slide_segments in await asyncio.gather(*slide_tasks) for segment in slide_segments]
+        logger.debug("🤖 GENERATED CONTENT FOR %s SEGMENTS", len(built))
+        if not built:
+            return [], [], []
+        segment_jobs, generated_contents, segment_images = (list(column) for column in zip(*built))
+        return segment_jobs, generated_contents, segment_images
+    
+    async def _agenerate_segment_content(self, segment_info: Dict, segment_pages: List[Dict],
+                                         structure_analysis: Dict, semaphore: asyncio.Semaphore) -> str:
+        """Generate content for a single segment; the semaphore caps concurrent LLM calls"""
+        try:
+            async with semaphore:
+                generated_content = await self._acached_completion(
+                    **self._segment_content_request(segment_info, segment_pages, structure_analysis)
                 )
-                
-                self.segments.append(presentation_segment)
-                segment_counter += 1
-        
-        print(f"\n🎉 ADAPTIVE PRESENTATION COMPLETE!")
-        print(f"📊 Final Statistics:")
-        print(f"  - Total adaptive segments: {len(self.segments)}")
-        print(f"  - Total duration: {sum(seg.duration_seconds for seg in self.segments)} seconds")
-        print(f"  - Document type: {structure_analysis.get('document_type', 'unknown')}")
-        print(f"  - Processing strategy: {slide_config.get('strategy', 'unknown')}")
-        
-        return self._build_final_presentation(structure_analysis, slide_config)
+            
+            logger.debug("✅ GENERATED ADAPTIVE CONTENT:")
+            logger.debug("   📝 Content (%s chars): %s...", len(generated_content), generated_content[:150])
+            
+            return generated_content
+            
+        except Exception as e:
+            logger.error("❌ Error generating segment content: %s", e)
+            return self._fallback_segment_content(segment_info)
+    
+    def _fallback_segment_content(self, segment_info: Dict) -> str:
+        """Placeholder narration used when content generation fails"""
+        return f"Here we explore {segment_info.get('segment_title', 'important features')} as detailed in our document."
     
-    def _generate_segment_content(self, segment_info: Dict, segment_pages: List[Dict], structure_analysis: Dict) -> str:
-        """Generate content for a single segment"""
+    def _segment_content_request(self, segment_info: Dict, segment_pages: List[Dict], structure_analysis: Dict) -> Dict[str, Any]:
+        """Build the chat completion parameters for a single segment's content"""
         
-        # Build segment content
-        segment_content = ""
-        for page in segment_pages:
-            page_text = page.get('text', '')
-            segment_content += f"Page {page['page_number']}: {page_text}\n"
+        segment_content = self._segment_page_content(segment_pages)
         
         document_type = structure_analysis.get('document_type', 'mixed_content')
         
-        # Generate focused content for this segment
-        content_prompt = f"""
-        Create brief presentation content for: {segment_info.get('segment_title', 'Content')}
+        return {
+            "model": self.CONTENT_MODEL,
+            "messages": [
+                {"role": "system", "content": SEGMENT_CONTENT_SYSTEM_MSG},
+                {"role": "user", "content": f"""DOCUMENT TYPE: {document_type}
+SEGMENT: {segment_info.get('segment_title', 'Content')}
+FOCUS: {segment_info.get('main_topic', 'Content information')}
+
+Content from specific pages:
+{segment_content}"""}
+            ],
+            "max_tokens": 100,
+            "temperature": 0.2
+        }
+    
+    async def _agenerate_contents_with_batch_api(self, segment_jobs: List[tuple], structure_analysis: Dict) -> List[str]:
+        """Generate every segment's content through one OpenAI Batch API job, reusing cached results"""
+        
+        requests = [self._segment_content_request(segment_info, segment_pages, structure_analysis)
+                    for segment_info, segment_pages, _ in segment_jobs]
+        contents = await self._arun_batch(requests, "segment content")
+        return [content or self._fallback_segment_content(segment_info)
+                for content, (segment_info, _, _) in zip(contents, segment_jobs)]
+    
+    async def _arun_batch(self, requests: List[Dict[str, Any]], label: str,
+                          poll_interval: float = 30, max_poll_interval: float = 600) -> List[Optional[str]]:
+        """Run chat completion requests as one OpenAI Batch API job, skipping and filling the completion cache.
         
-        FOCUS: {segment_info.get('main_topic', 'Content information')}
-        DOCUMENT TYPE: {document_type}
+        Returns the content for each request in order, or None where the request failed.
+        """
+        contents: Dict[int, str] = {}
+        for i, params in enumerate(requests):
+            cached = self.response_cache.get(self.response_cache.completion_key(params))
+            if cached is not None:
+                contents[i] = cached
+        
+        pending = [i for i in range(len(requests)) if i not in contents]
+        if pending:
+            try:
+                jsonl = "\n".join(json.dumps({
+                    "custom_id": f"request_{i}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": requests[i]
+                }) for i in pending)
+                input_file = openai.File.create(file=io.BytesIO(jsonl.encode()), purpose="batch")
+                
+                # openai 0.28 has no Batch resource, so talk to /batches through the raw requestor
+                requestor = openai.api_requestor.APIRequestor()
+                batch, _, _ = requestor.request("post", "/batches", {
+                    "input_file_id": input_file["id"],
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": "24h"
+                })
+                batch = batch.data
+                logger.debug("📦 Submitted batch %s with %s %s requests", batch['id'], len(pending), label)
+                
+                # Poll with exponential backoff until the batch reaches a terminal state
+                while batch["status"] not in ("completed", "failed", "expired", "cancelled"):
+                    await asyncio.sleep(poll_interval)
+                    poll_interval = min(poll_interval * 2, max_poll_interval)
+                    response, _, _ = requestor.request("get", f"/batches/{batch['id']}")
+                    batch = response.data
+                    logger.debug("⏳ Batch %s status: %s", batch['id'], batch['status'])
+                
+                if batch.get("output_file_id"):
+                    for line in openai.File.download(batch["output_file_id"]).decode().splitlines():
+                        result = load_json_bytes(line)
+                        i = int(result["custom_id"].split("_")[1])
+                        body = (result.get("response") or {}).get("body") or {}
+                        if body.get("choices"):
+                            contents[i] = body["choices"][0]["message"]["content"]
+                            self.response_cache.set(self.response_cache.completion_key(requests[i]), contents[i])
+            except Exception as e:
+                logger.error("❌ Error running %s requests with the Batch API: %s", label, e)
         
-        Content from specific pages:
-        {segment_content}
+        return [contents.get(i) for i in range(len(requests))]
+    
+    def _segment_page_content(self, segment_pages: List[Dict]) -> str:
+        """Concatenate the text of a segment's pages, labelled by page number"""
+        return "".join(f"Page {page['page_number']}: {page.get('text', '')}\n" for page in segment_pages)
+    
+    async def _agenerate_segment_batch(self, segment_jobs: List[tuple], structure_analysis: Dict,
+                                       semaphore: asyncio.Semaphore) -> List[str]:
+        """Generate content for several segments with one LLM call, falling back to per-segment calls"""
         
-        Requirements:
-        - Create concise content (2-3 sentences) about THIS specific topic only
-        - Highlight the most important feature or benefit
-        - Use the actual product name from the source material
-        - Keep it brief since viewers can see the detailed image
-        - Focus on what makes this product unique or valuable
-        - Adapt tone based on document type: {document_type}
+        document_type = structure_analysis.get('document_type', 'mixed_content')
+        if len(segment_jobs) == 1:
+            segment_info, segment_pages, _ = segment_jobs[0]
+            return [await self._agenerate_segment_content(segment_info, segment_pages, structure_analysis, semaphore)]
         
-        Write as natural, brief speaking content that complements the visual information.
-        """
+        segments_json = json.dumps([{
+            "id": idx,
+            "title": segment_info.get('segment_title', 'Content'),
+            "focus": segment_info.get('main_topic', 'Content information'),
+            "content": self._segment_page_content(segment_pages)
+        } for idx, (segment_info, segment_pages, _) in enumerate(segment_jobs)], ensure_ascii=False)
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": f"Create brief presentation content for {document_type} documents. Be concise since viewers can see detailed images."},
-                    {"role": "user", "content": content_prompt}
-                ],
-                max_tokens=100,
-                temperature=0.2
-            )
-            
-            generated_content = response.choices[0].message['content']
+            async with semaphore:
+                result = load_json_bytes(await self._acached_completion(
+                    model=self.CONTENT_MODEL,
+                    messages=[
+                        {"role": "system", "content": SEGMENT_BATCH_SYSTEM_MSG},
+                        {"role": "user", "content": f"""DOCUMENT TYPE: {document_type}
+
+Segments (JSON, each with the content from its specific pages):
+{segments_json}"""}
+                    ],
+                    max_tokens=150 * len(segment_jobs),
+                    temperature=0.2,
+                    response_format={"type": "json_object"}
+                ))
             
-            print(f"✅ GENERATED ADAPTIVE CONTENT:")
-            print(f"   📝 Content ({len(generated_content)} chars): {generated_content[:150]}...")
+            contents = {item['id']: item['content'] for item in result['segments']}
+            generated = [contents[idx] for idx in range(len(segment_jobs))]
             
-            return generated_content
+            logger.debug("✅ GENERATED ADAPTIVE CONTENT FOR %s SEGMENTS IN ONE CALL", len(generated))
+            return generated
             
         except Exception as e:
-            print(f"❌ Error generating segment content: {e}")
-            return f"Here we explore {segment_info.get('segment_title', 'important features')} as detailed in our document."
+            logger.warning("⚠️ Batched segment generation failed (%s), generating segments individually", e)
+            return list(await asyncio.gather(*[
+                self._agenerate_segment_content(segment_info, segment_pages, structure_analysis, semaphore)
+                for segment_info, segment_pages, _ in segment_jobs
+            ]))
     
-    def _create_presentation_segment(self, segment_info: Dict, segment_pages: List[Dict], 
-                                   content: str, segment_id: int, slide_info: Dict) -> 'PresentationSegment':
-        """Create PresentationSegment object from segment data"""
+    async def _aload_image(self, path: str) -> str:
+        """Read and base64-encode a page image without blocking the event loop"""
+        cache_key = (path, os.stat(path).st_mtime_ns)
+        data_url = _image_data_urls.get(cache_key)
+        if data_url is not None:
+            _image_data_urls.move_to_end(cache_key)
+            return data_url
+        
+        async with aiofiles.open(path, 'rb') as img_file:
+            data = await img_file.read()
+        encoded = await asyncio.get_running_loop().run_in_executor(None, base64.b64encode, data)
+        mime_type = mimetypes.guess_type(path)[0] or 'image/png'
+        data_url = f"data:{mime_type};base64,{encoded.decode()}"
+        
+        _image_data_urls[cache_key] = data_url
+        if len(_image_data_urls) > MAX_CACHED_IMAGES:
+            _image_data_urls.popitem(last=False)
+        return data_url
+    
+    async def _aload_segment_images(self, segment_info: Dict, segment_pages: List[Dict]) -> List[str]:
+        """Load the page images for a segment concurrently, keeping page order"""
+        logger.debug("🖼️ Loading images for segment: %s", segment_info.get('segment_title', 'Unknown'))
+        image_pages = [page for page in segment_pages if page.get('full_page_image')]
+        for page in segment_pages:
+            if not page.get('full_page_image'):
+                logger.debug("  ⚪ No image on page %s", page.get('page_number'))
+        
+        results = await asyncio.gather(
+            *[self._aload_image(page['full_page_image']) for page in image_pages],
+            return_exceptions=True
+        )
         
-        # Get relevant page images
         images = []
-        print(f"🖼️ Loading images for segment: {segment_info.get('segment_title', 'Unknown')}")
-        for page in segment_pages:
-            if page.get('full_page_image'):
-                try:
-                    with open(page['full_page_image'], 'rb') as img_file:
-                        img_data = base64.b64encode(img_file.read()).decode()
-                        images.append(f"data:image/png;base64,{img_data}")
-                    print(f"  ✓ Loaded image from page {page.get('page_number')}")
-                except Exception as e:
-                    print(f"  ❌ Failed to load image from page {page.get('page_number')}: {e}")
+        for page, result in zip(image_pages, results):
+            if isinstance(result, Exception):
+                logger.debug("  ❌ Failed to load image from page %s: %s", page.get('page_number'), result)
             else:
-                print(f"  ⚪ No image on page {page.get('page_number')}")
+                images.append(result)
+                logger.debug("  ✓ Loaded image from page %s", page.get('page_number'))
+        return images
+    
+    def _create_presentation_segment(self, segment_info: Dict, segment_pages: List[Dict], 
+                                   content: str, segment_id: int, slide_info: Dict,
+                                   images: List[str], total_duration: float) -> 'PresentationSegment':
+        """Create PresentationSegment object from segment data, its loaded page images and its speaking time"""
         
         # Calculate timing for images
-        words = content.split()
-        total_duration = max(8, len(words) / 2.5)  # ~150 words per minute, minimum 8 seconds
-        
         image_timing = None
         if len(images) > 1:
             # Distribute images evenly throughout the speech
@@ -1339,10 +1960,9 @@ class PresentationGenerator:
             for j in range(len(images)):
                 timing = (total_duration / len(images)) * j
                 image_timing.append(timing)
-            print(f"⏰ Image timing calculated: {[f'{t:.1f}s' for t in image_timing]}")
+            logger.debug("⏰ Image timing calculated: %s", [f'{t:.1f}s' for t in image_timing])
         
         # Create presentation segment
-        from models import PresentationSegment
         segment = PresentationSegment(
             id=segment_id,
             text=content,
@@ -1375,6 +1995,14 @@ class PresentationGenerator:
             } for seg in self.segments]
         }
     
+    async def _agenerate_all_slide_content(self, slides: List[Dict], pages_data: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Run agenerate_slide_content for every slide concurrently, keeping slide order"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+        image_tasks: Dict[str, asyncio.Future] = {}  # Shared so each page image is read once, however many segments show it
+        return list(await asyncio.gather(*[
+            self.agenerate_slide_content(slide_info, pages_data, semaphore, image_tasks) for slide_info in slides
+        ]))
+    
     def create_legacy_presentation(self, pages_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Legacy method - create presentation using original logic (kept for backward compatibility)"""
         
@@ -1384,34 +2012,38 @@ class PresentationGenerator:
         # Analyze structure using original method
         structure = self.analyze_pdf_structure(pages_data)
         
-        print(f"\n🔧 CREATING PRESENTATION SEGMENTS WITH LEGACY SEGMENTATION...")
+        logger.debug("🔧 CREATING PRESENTATION SEGMENTS WITH LEGACY SEGMENTATION...")
+        
+        # Segment and write every slide concurrently; the semaphore caps in-flight LLM calls
+        slides = structure.get('slides', [])
+        logger.debug("📋 Processing %s slides with legacy segmentation", len(slides))
+        all_slide_segments = asyncio.run(self._agenerate_all_slide_content(slides, pages_data))
+        
+        # Page images were loaded alongside the content calls, each path once
+        image_urls = {path: url
+                      for slide_segments in all_slide_segments for slide_segment in slide_segments
+                      for path, url in slide_segment['image_urls'].items()}
         
         # Generate presentation segments using original logic
         self.segments = []
         segment_counter = 0
         
-        for i, slide_info in enumerate(structure.get('slides', [])):
-            print(f"\n📋 Processing slide {i+1}/{len(structure.get('slides', []))} with legacy segmentation")
-            
-            # Get multiple focused segments for this slide using original method
-            slide_segments = self.generate_slide_content(slide_info, pages_data)
-            
+        for slide_segments in all_slide_segments:
             # Convert each segment to PresentationSegment
             for slide_segment in slide_segments:
                 # Get relevant page images
                 images = []
-                print(f"🖼️ Loading images for segment: {slide_segment['title']}")
+                logger.debug("🖼️ Loading images for segment: %s", slide_segment['title'])
                 for page in slide_segment.get('relevant_pages', []):
                     if page.get('full_page_image'):
-                        try:
-                            with open(page['full_page_image'], 'rb') as img_file:
-                                img_data = base64.b64encode(img_file.read()).decode()
-                                images.append(f"data:image/png;base64,{img_data}")
-                            print(f"  ✓ Loaded image from page {page.get('page_number')}")
-                        except Exception as e:
-                            print(f"  ❌ Failed to load image from page {page.get('page_number')}: {e}")
+                        image_url = image_urls[page['full_page_image']]
+                        if isinstance(image_url, Exception):
+                            logger.debug("  ❌ Failed to load image from page %s: %s", page.get('page_number'), image_url)
+                        else:
+                            images.append(image_url)
+                            logger.debug("  ✓ Loaded image from page %s", page.get('page_number'))
                     else:
-                        print(f"  ⚪ No image on page {page.get('page_number')}")
+                        logger.debug("  ⚪ No image on page %s", page.get('page_number'))
                 
                 # Calculate timing for images
                 words = slide_segment['content'].split()
@@ -1424,15 +2056,15 @@ class PresentationGenerator:
                     for j in range(len(images)):
                         timing = (total_duration / len(images)) * j
                         image_timing.append(timing)
-                    print(f"⏰ Image timing calculated: {[f'{t:.1f}s' for t in image_timing]}")
+                    logger.debug("⏰ Image timing calculated: %s", [f'{t:.1f}s' for t in image_timing])
                 
-                print(f"📊 Segment summary:")
-                print(f"  - Title: {slide_segment['title']}")
-                print(f"  - Duration: {total_duration:.1f} seconds")
-                print(f"  - Images: {len(images)}")
-                print(f"  - Category: {slide_segment.get('category', 'general')}")
-                print(f"  - Strategy: {slide_segment.get('image_strategy', 'show_multiple')}")
-                print(f"  - Text preview: {slide_segment['content'][:100]}...")
+                logger.debug("📊 Segment summary:")
+                logger.debug("  - Title: %s", slide_segment['title'])
+                logger.debug("  - Duration: %.1f seconds", total_duration)
+                logger.debug("  - Images: %s", len(images))
+                logger.debug("  - Category: %s", slide_segment.get('category', 'general'))
+                logger.debug("  - Strategy: %s", slide_segment.get('image_strategy', 'show_multiple'))
+                logger.debug("  - Text preview: %s...", slide_segment['content'][:100])
                 
                 # Create presentation segment
                 segment = PresentationSegment(
@@ -1448,19 +2080,20 @@ class PresentationGenerator:
                 )
                 self.segments.append(segment)
                 segment_counter += 1
+        self._index_segments()
         
-        print(f"\n🎉 INTELLIGENT SEGMENTATION COMPLETE!")
-        print(f"📊 Final Statistics:")
-        print(f"  - Total focused segments: {len(self.segments)}")
-        print(f"  - Total duration: {sum(seg.duration_seconds for seg in self.segments)} seconds")
-        print(f"  - Segments with images: {len([seg for seg in self.segments if seg.images])}")
-        print(f"  - Total images: {sum(len(seg.images) for seg in self.segments)}")
+        logger.debug("🎉 INTELLIGENT SEGMENTATION COMPLETE!")
+        logger.debug("📊 Final Statistics:")
+        logger.debug("  - Total focused segments: %s", len(self.segments))
+        logger.debug("  - Total duration: %s seconds", self.get_total_duration())
+        logger.debug("  - Segments with images: %s", len([seg for seg in self.segments if seg.images]))
+        logger.debug("  - Total images: %s", sum(len(seg.images) for seg in self.segments))
         
         category_breakdown = {}
         for seg in self.segments:
             cat = getattr(seg, 'category', 'general')
             category_breakdown[cat] = category_breakdown.get(cat, 0) + 1
-        print(f"  - Category breakdown: {category_breakdown}")
+        logger.debug("  - Category breakdown: %s", category_breakdown)
         
         logger.info(f"Created presentation with {len(self.segments)} focused segments using AI segmentation")
         
@@ -1477,12 +2110,19 @@ class PresentationGenerator:
             } for seg in self.segments]
         }
     
+    def _index_segments(self):
+        """Rebuild the id -> segment index and total duration after self.segments is replaced"""
+        self._segments_by_id = {seg.id: seg for seg in self.segments}
+        self._total_duration = sum(seg.duration_seconds for seg in self.segments)
+    
     def get_segment(self, segment_id: int) -> Optional[PresentationSegment]:
-        """Get a specific presentation segment"""
-        if 0 <= segment_id < len(self.segments):
-            return self.segments[segment_id]
-        return None
+        """Get a specific presentation segment by its id"""
+        return self._segments_by_id.get(segment_id)
         
     def get_total_segments(self) -> int:
         """Get total number of presentation segments"""
-        return len(self.segments)
\ No newline at end of file
+        return len(self.segments)
+    
+    def get_total_duration(self) -> int:
+        """Get total speaking time of the presentation in seconds"""
+        return self._total_duration
\ No newline at end of file
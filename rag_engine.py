@@ -4,6 +4,7 @@ import openai
 from dotenv import load_dotenv
 from vector_store import VectorStore
 from models import BotResponse
+from llm_cache import LLMCache
 import logging
 import base64
 
@@ -19,6 +20,8 @@ class RAGEngine:
         self.vector_store = vector_store
         if not self.vector_store:
             self.vector_store = VectorStore()
+        
+        self.response_cache = LLMCache()
             
     async def answer_question(self, question: str, conversation_context: str = "") -> BotResponse:
         try:
@@ -74,16 +77,20 @@ class RAGEngine:
                     "content": f"Document Context:\n{knowledge_context}\n\nQuestion: {question}"
                 })
             
-            # Generate answer using OpenAI
+            # Generate answer using OpenAI, reusing the cached answer for an identical prompt
+            cache_key = self.response_cache.key(messages, question, [page['page_id'] for page in related_pages])
+            answer = self.response_cache.get(cache_key)
             try:
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=300
-                )
-                
-                answer = response.choices[0].message['content']
+                if answer is None:
+                    response = await openai.ChatCompletion.acreate(
+                        model="gpt-3.5-turbo",
+                        messages=messages,
+                        temperature=0.7,
+                        max_tokens=300
+                    )
+                    
+                    answer = response.choices[0].message['content']
+                    self.response_cache.set(cache_key, answer)
             except Exception as openai_error:
                 logger.error(f"OpenAI API error: {openai_error}")
                 # Fallback to a simple context-based response
@@ -1,6 +1,6 @@
 import openai
 import os
-from typing import List, Dict, Any, Generator
+from typing import List, Dict, Any, Generator, AsyncGenerator, Optional, Tuple
 from dotenv import load_dotenv
 import json
 import time
@@ -13,14 +13,21 @@ class StreamingChatbot:
         self.vector_store = vector_store
         self.conversation_history = []
         self.max_history = 10  # Keep last 10 exchanges
+        self._last_search = None  # (query, k, results) of the most recent vector search
         
     def search_context(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
         """Search for relevant context from vector store"""
         if not self.vector_store:
             return []
         
+        # get_related_pages and the response for the same turn search the same text;
+        # results are ranked, so a wider earlier search answers a narrower one
+        if self._last_search and self._last_search[0] == query and self._last_search[1] >= k:
+            return self._last_search[2][:k]
+        
         try:
             results = self.vector_store.search(query, k=k)
+            self._last_search = (query, k, results)
             return results
         except Exception as e:
             print(f"Error searching context: {e}")
@@ -49,8 +56,8 @@ class StreamingChatbot:
         
         return context, history_context
     
-    def generate_streaming_response(self, query: str) -> Generator[str, None, None]:
-        """Generate streaming response using OpenAI API with RAG"""
+    def _build_messages(self, query: str) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+        """Build chat messages with RAG context and history; returns (messages, relevant_pages)"""
         
         # Search for relevant context
         relevant_pages = self.search_context(query)
@@ -96,6 +103,21 @@ class StreamingChatbot:
         # Add current user message
         messages.append(user_message)
         
+        return messages, relevant_pages
+    
+    @staticmethod
+    def _chunk_content(chunk) -> Optional[str]:
+        """Extract the content delta from a streamed completion chunk"""
+        if 'choices' in chunk and len(chunk['choices']) > 0:
+            delta = chunk['choices'][0].get('delta', {})
+            if 'content' in delta:
+                return delta['content']
+        return None
+    
+    def generate_streaming_response(self, query: str) -> Generator[str, None, None]:
+        """Generate streaming response using OpenAI API with RAG"""
+        messages, relevant_pages = self._build_messages(query)
+        
         try:
             # Create streaming response
             response = openai.ChatCompletion.create(
@@ -108,12 +130,39 @@ class StreamingChatbot:
             
             full_response = ""
             for chunk in response:
-                if 'choices' in chunk and len(chunk['choices']) > 0:
-                    delta = chunk['choices'][0].get('delta', {})
-                    if 'content' in delta:
-                        content = delta['content']
-                        full_response += content
-                        yield content
+                content = self._chunk_content(chunk)
+                if content is not None:
+                    full_response += content
+                    yield content
+            
+            # Store in conversation history
+            self.add_to_history(query, full_response, relevant_pages)
+            
+        except Exception as e:
+            error_msg = f"Error generating response: {str(e)}"
+            yield error_msg
+            self.add_to_history(query, error_msg, [])
+    
+    async def agenerate_streaming_response(self, query: str) -> AsyncGenerator[str, None]:
+        """Async variant of generate_streaming_response that doesn't block the event loop"""
+        messages, relevant_pages = self._build_messages(query)
+        
+        try:
+            # Create streaming response
+            response = await openai.ChatCompletion.acreate(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                max_tokens=1500,
+                temperature=0.7,
+                stream=True
+            )
+            
+            full_response = ""
+            async for chunk in response:
+                content = self._chunk_content(chunk)
+                if content is not None:
+                    full_response += content
+                    yield content
             
             # Store in conversation history
             self.add_to_history(query, full_response, relevant_pages)
@@ -151,6 +200,11 @@ class StreamingChatbot:
     def clear_history(self):
         """Clear conversation history"""
         self.conversation_history = []
+        self.reset_search_cache()
+    
+    def reset_search_cache(self):
+        """Forget the cached search; call whenever the vector store is re-indexed"""
+        self._last_search = None
     
     def get_related_pages(self, query: str) -> List[Dict[str, Any]]:
         """Get pages related to the current query for display"""
@@ -0,0 +1,62 @@
+import streamlit as st
+import os
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _load_image_bytes(path, mtime):
+    """Read an image file once per (path, mtime); decoding is left to the browser"""
+    with open(path, "rb") as f:
+        return f.read()
+
+def load_image(path):
+    """Get cached image bytes for a path, invalidated when the file changes"""
+    return _load_image_bytes(path, os.path.getmtime(path))
+
+def display_page_text(page_data):
+    """Display a page's text content with a preview and full-text expander"""
+    st.write("**Text Content:**")
+    if page_data['text']:
+        # Limit text length for better layout
+        text_preview = page_data['text'][:500] + "..." if len(page_data['text']) > 500 else page_data['text']
+        st.write(text_preview)
+        if len(page_data['text']) > 500:
+            with st.expander("Show full text"):
+                st.write(page_data['text'])
+    else:
+        st.write("*No text content found on this page*")
+
+def display_page_content(page_data):
+    """Display a single page's content with full page image"""
+    st.subheader(f"📄 {page_data['pdf_name']} - Page {page_data['page_number']}")
+    
+    # Create two columns: text on left, page image on right
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        # Display text content
+        display_page_text(page_data)
+    
+    with col2:
+        # Display full page image
+        st.write("**Full Page:**")
+        if page_data.get('full_page_image_ok'):
+            try:
+                page_image = load_image(page_data.get('thumb_image') or page_data['full_page_image'])
+                st.image(page_image, caption=f"Page {page_data['page_number']}", use_column_width=True)
+                if page_data.get('thumb_image'):
+                    with st.expander("Show full-res page"):
+                        st.image(load_image(page_data['full_page_image']), use_column_width=True)
+            except Exception as e:
+                st.error(f"Error loading page image: {e}")
+        else:
+            st.warning("Full page image not available")
+            
+            # Fallback: show individual extracted images if available
+            if page_data.get('images'):
+                st.write(f"**Extracted Images ({len(page_data['images'])}):**")
+                for i, img_info in enumerate(page_data['images']):
+                    try:
+                        if img_info.get('ok'):
+                            image = load_image(img_info['image_path'])
+                            st.image(image, caption=f"Image {i+1}", width=200)
+                    except Exception as e:
+                        st.error(f"Error loading image: {e}")
@@ -4,12 +4,15 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import asyncio
+import atexit
 import json
 import os
 import tempfile
 from typing import List, AsyncGenerator, Dict
 import aiofiles
 import logging
+import logging.handlers
+import queue
 
 from pdf_processor import PDFProcessor
 from vector_store import VectorStore
@@ -20,9 +23,16 @@ from rag_engine import RAGEngine
 from voice_handler import VoiceHandler
 from pdf_cache_manager import PDFCacheManager
 from models import UserMessage, BotResponse, PricingRequest, ConversationMode
+from json_utils import load_json_bytes
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; records are queued and formatted/written on a listener thread
+log_queue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(log_queue)])
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="PDF AI Assistant")
@@ -180,11 +190,12 @@ async def upload_pdfs(files: List[UploadFile] = File(...)):
         vector_store.create_embeddings(pages_data)
         
         # Generate presentation
-        presentation_data = presentation_generator.create_full_presentation(pages_data)
+        presentation_data = await presentation_generator.acreate_full_presentation(pages_data)
         
         # Cache the results with original filenames
         cache_hash = pdf_cache_manager.cache_processing_results(
-            temp_paths, pages_data, vector_store, presentation_data, presentation_generator, original_filenames
+            temp_paths, pages_data, vector_store, presentation_data, presentation_generator, original_filenames,
+            files_hash=files_hash
         )
         
         # Clean up temp files
@@ -268,7 +279,7 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
         # Listen for user messages
         while True:
             data = await websocket.receive_text()
-            message_data = json.loads(data)
+            message_data = load_json_bytes(data)
             
             # Handle control commands
             if 'command' in message_data:
@@ -445,7 +456,6 @@ async def handle_presentation_command(conversation_id: str, command: str):
             logger.info(f"SENDING MID-SEGMENT RESUME for segment {state.paused_at_segment}")
             # Send resume signal to frontend instead of restarting segment
             if conversation_id in websocket_connections:
-                import json
                 websocket = websocket_connections[conversation_id]
                 resume_message = {
                     "type": "resume_mid_segment",
@@ -585,7 +595,7 @@ async def stream_chat(message: ChatMessage):
             
             # Stream the response
             response_text = ""
-            for chunk in chatbot.generate_streaming_response(message.message):
+            async for chunk in chatbot.agenerate_streaming_response(message.message):
                 response_text += chunk
                 chunk_data = {
                     "type": "chunk",